@@ -3,16 +3,22 @@
 # ============================
 import pandas as pd
 import numpy as np
-import re
 import os
 import time
 import requests
 import joblib
-from nltk.tokenize import word_tokenize
+from functools import lru_cache
 from sentence_transformers import SentenceTransformer
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 import nltk
+from text_cleaning import clean_text, clean_text_bulk
+from crime_profiles import generate_crime_profile
+from severity_labeling import label_severity
+from similar_cases import CaseIndex, INDEX_DIR
+from metrics import llm_errors, timed_stage
+from severity_inference import (EMBEDDING_MODEL, INFERENCE_MODE, SOCKET_PATH, BatchedSeverityModel,
+                                SeverityClient, SeverityModel)
 
 nltk.download('punkt', download_dir="./nltk_data")
 nltk.download("punkt_tab", download_dir="./nltk_data")
@@ -33,17 +39,16 @@ df = df.sample(3000, random_state=42).reset_index(drop=True)
 # ============================
 # 🔤 Text Cleaning
 # ============================
-def clean_text(text):
-    text = str(text).lower()
-    text = re.sub(r'[^a-zA-Z\s]', '', text)
-    return ' '.join(word_tokenize(text))
-
-df['Clean_Profile'] = df['Crime_Profile_Text'].fillna('').apply(clean_text)
+# clean_text (per row, used at inference) and clean_text_bulk (whole column)
+# live in text_cleaning.py and produce identical output.
+df['Clean_Profile'] = clean_text_bulk(df['Crime_Profile_Text'].fillna(''))
 
 # ============================
 # 🤖 Embedding Model
 # ============================
-model_st = SentenceTransformer("all-mpnet-base-v2")
+# In "socket" mode the severity_inference.py sidecar holds the only copy
+model_st = SentenceTransformer(EMBEDDING_MODEL) if INFERENCE_MODE != "socket" else None
+# Full-dataset embeddings + retraining: see train_severity_model.py
 #print("🔄 Generating embeddings...")
 #text_embeddings = model_st.encode(df['Clean_Profile'].tolist(), show_progress_bar=True)
 #np.save('text_embeddings.npy', text_embeddings)
@@ -53,27 +58,17 @@ text_embeddings = np.load('text_embeddings_for_severity_score.npy')
 # ============================
 # 🎯 Proxy Labeling
 # ============================
-def generate_proxy_score(text):
-    score = 0
-    if any(w in text for w in ['murder', 'homicide', 'gun', 'dead', 'shoot']):
-        score += 8
-    elif 'assault' in text or 'weapon' in text:
-        score += 6
-    elif 'robbery' in text or 'burglary' in text:
-        score += 5
-    elif 'fraud' in text or 'identity' in text:
-        score += 3
-    elif 'theft' in text:
-        score += 2
-    return min(score, 10)
-
-df['Severity_Score'] = df['Clean_Profile'].apply(generate_proxy_score)
+# Keyword rules live in severity_rules.json (default reproduces generate_proxy_score)
+df['Severity_Score'], severity_rule_hits = label_severity(df['Clean_Profile'])
 
 # ============================
 # ✅ Train or Load Regressor
 # ============================
+# Like the embedding model, the regressor lives in the sidecar in "socket" mode
 model_path = "severity_regressor.pkl"
-if os.path.exists(model_path):
+if INFERENCE_MODE == "socket":
+    regressor = None
+elif os.path.exists(model_path):
     regressor = joblib.load(model_path)
     print("✅ Regressor loaded from disk.")
 else:
@@ -87,15 +82,16 @@ else:
     print("✅ Regressor trained and saved.")
 
 # ============================
-# 📘 Load MOCODE Map
+# ⚡ Severity Inference
 # ============================
-mocode_df = pd.read_csv("mocode_data.csv")
-mocode_df['mocode_str'] = mocode_df['mocode'].astype(int).astype(str).str.zfill(4)
-mocode_mapping = dict(zip(mocode_df['mocode_str'], mocode_df['description']))
-
-def map_mocodes_to_text(mocode_input):
-    codes = mocode_input.strip().split()
-    return ", ".join([mocode_mapping.get(code.zfill(4), f"Unknown({code})") for code in codes])
+# SEVERITY_INFERENCE: "direct" (one encode + predict per request), "batched"
+# (concurrent requests share a pass) or "socket" (severity_inference.py sidecar)
+if INFERENCE_MODE == "socket":
+    severity_model = SeverityClient(SOCKET_PATH)
+elif INFERENCE_MODE == "batched":
+    severity_model = BatchedSeverityModel(SeverityModel(model_st, regressor))
+else:
+    severity_model = SeverityModel(model_st, regressor)
 
 # ============================
 # 🤖 LLM Refinement
@@ -133,46 +129,48 @@ Respond in JSON with:
     }
 
     try:
-        response = requests.post(groq_url, headers=headers, json=payload)
+        with timed_stage("llm"):
+            response = requests.post(groq_url, headers=headers, json=payload)
         parsed = response.json()['choices'][0]['message']['content']
         import json
         result = json.loads(parsed)
         return round(result.get("final_score", model_score), 2), result.get("tips", [])
     except Exception as e:
+        llm_errors.inc("severity", type(e).__name__)
         print("LLM error:", e)
         return round(model_score, 2), []
 
 # ============================
 # 🧪 Inference on New Victim Input
 # ============================
-def generate_crime_profile(vict_age, vict_sex, vict_descent, crime_desc, premis, area, time_day, day, month, year, mocodes, weapon):
-    sex_full = {"F": "Female", "M": "Male", "X": "Unknown"}.get(vict_sex.upper(), "Unknown")
-    descent_full = {
-        'A': 'Other Asian', 'B': 'Black', 'C': 'Chinese', 'D': 'Cambodian',
-        'F': 'Filipino', 'G': 'Guamanian', 'H': 'Hispanic/Latin/Mexican',
-        'I': 'American Indian/Alaskan Native', 'J': 'Japanese', 'K': 'Korean',
-        'L': 'Laotian', 'O': 'Other', 'P': 'Pacific Islander', 'S': 'Samoan',
-        'U': 'Hawaiian', 'V': 'Vietnamese', 'W': 'White', 'X': 'Unknown', 'Z': 'Asian Indian'
-    }.get(vict_descent.upper(), "Unknown")
-
-    season = {12:'Winter',1:'Winter',2:'Winter',3:'Spring',4:'Spring',5:'Spring',6:'Summer',7:'Summer',8:'Summer',9:'Fall',10:'Fall',11:'Fall'}.get(month, "Unknown")
-    time_desc = { 'Morning': 'morning', 'Afternoon': 'afternoon', 'Evening': 'evening', 'Night': 'night' }.get(time_day, "unknown")
-    month_name = ['January','February','March','April','May','June','July','August','September','October','November','December'][month-1]
-
-    age_group = "child" if vict_age < 18 else "adult" if vict_age <= 60 else "senior"
-    mocode_text = map_mocodes_to_text(mocodes)
-
-    return " ".join([
-        f"The victim was an {age_group} individual (age {vict_age}), identified as {sex_full} of {descent_full} descent.",
-        f"They were involved in a reported case of {crime_desc.lower()}, which occurred at a {premis.lower()}.",
-        f"The incident took place during the {time_desc} hours, in {month_name} ({season} season), on a {day} in the year {year}, within the {area} area.",
-        f"The suspect's behavior included: {mocode_text.lower()}, and the weapon used was: {weapon.lower()}."
-    ])
+# generate_crime_profile and map_mocodes_to_text live in crime_profiles.py,
+# next to build_profiles (the whole incident table, byte-identical output)
+
+@lru_cache(maxsize=256)
+def score_profile(cleaned):
+    # (embedding, model score), shared by the severity prediction and the similar-case lookup.
+    # "inference" is the request's whole wait, batching included; the model's
+    # "embedding" and "regressor" stages are timed in SeverityModel.score_batch
+    with timed_stage("inference"):
+        return severity_model.score(cleaned)
 
 def predict_severity_from_inputs(**kwargs):
     profile_text = generate_crime_profile(**kwargs)
     cleaned = clean_text(profile_text)
-    emb = model_st.encode([cleaned])
-    model_score = regressor.predict(emb)[0]
+    _, model_score = score_profile(cleaned)
     final_score, tips = refine_score_with_llm(profile_text, model_score)
     return final_score, tips, profile_text
+
+
+# ============================
+# 🔎 Similar Past Cases
+# ============================
+# Built with similar_cases.py from the embeddings written by train_severity_model.py
+case_index = CaseIndex.load(INDEX_DIR) if os.path.exists(INDEX_DIR) else None
+
+def find_similar_cases(profile_text, k=5):
+    if case_index is None:
+        return []
+    emb, _ = score_profile(clean_text(profile_text))
+    with timed_stage("similar_cases"):
+        return case_index.search(emb[0], k=k)
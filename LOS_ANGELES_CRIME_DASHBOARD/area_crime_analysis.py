@@ -2,21 +2,29 @@ import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output
 import plotly.express as px
-import pandas as pd
-
-# Load the data
-crime_data = pd.read_csv("./crime_data_cleaned_2020_present.csv")
+from crime_queries import IncidentFilter, incident_queries
+from crime_rollups import GRANULARITIES
+from crime_store import crime_store
+from metrics import StageClock
+from figure_payloads import compact_dates, figure_update
 
 def app1_layout():
     return html.Div([
         html.H1("Crime Analysis by Area"),
         dcc.Dropdown(
             id='area-name-dropdown',
-            options=[{'label': i, 'value': i} for i in crime_data['AREA NAME'].unique()],
+            options=[{'label': i, 'value': i} for i in crime_store.snapshot().areas],
             value='Central',
             style={'width': '50%'}
         ),
         dcc.Graph(id='area-crime-type-bar'),
+        dcc.RadioItems(
+            id='area-trend-granularity',
+            options=GRANULARITIES,
+            value='Month',
+            inline=True
+        ),
+        dcc.Checklist(id='area-trend-rolling', options=['Rolling average'], value=[], inline=True),
         dcc.Graph(id='area-crime-time-series'),
         dcc.Graph(id='hourly-crime-area-bar'),
         dcc.Graph(id='victim-sex-pie'),
@@ -28,7 +36,6 @@ def app1_layout():
 def register_callbacks(app):
     @app.callback(
         [Output('area-crime-type-bar', 'figure'),
-         Output('area-crime-time-series', 'figure'),
          Output('hourly-crime-area-bar', 'figure'),
          Output('victim-sex-pie', 'figure'),
          Output('victim-descent-pie', 'figure'),
@@ -36,33 +43,35 @@ def register_callbacks(app):
         [Input('area-name-dropdown', 'value')]
     )
     def update_area_graphs(area_name):
-        filtered_area_df = crime_data[crime_data['AREA NAME'] == area_name]
+        clock = StageClock()
+        queries = incident_queries()
+        in_area = IncidentFilter(areas=(area_name,))
+
+        area_counts = queries.count_by('Crm Cd Desc', in_area, limit=15)
+        hourly_counts = queries.count_by('Hour', in_area)
+        victim_sex_counts = queries.count_by('Vict Sex', in_area)
+        victim_descent_counts = queries.count_by('Vict Descent', in_area)
+        age_bins = [0, 18, 35, 50, 65, 100]
+        age_labels = ['0-18', '19-35', '36-50', '51-65', '66+']
+        age_group_counts = queries.count_binned('Vict Age', age_bins, age_labels, in_area)
+        clock.lap("filter")
 
         # Area Crime Type Bar Chart
-        area_counts = filtered_area_df['Crm Cd Desc'].value_counts().head(15).reset_index()
         area_counts.columns = ['Crime Type', 'Count']
         area_crime_type_bar = px.bar(area_counts, x='Crime Type', y='Count', color='Crime Type',
                                      title=f"Crime Type Distribution in {area_name}")
 
-        # Time Series Chart (Monthly)
-        time_series = filtered_area_df.groupby(['Month']).size().reset_index(name='Count')
-        area_crime_time_series = px.line(time_series, x='Month', y='Count',
-                                         title=f"Crime Trends in {area_name} (Monthly)")
-
         # Hourly Crime Bar
-        hourly_counts = filtered_area_df['Hour'].value_counts().reset_index()
         hourly_counts.columns = ['Hour', 'Count']
         hourly_crime_area_bar = px.bar(hourly_counts, x='Hour', y='Count', color='Hour',
                                        title=f"Crime Distribution by Hour in {area_name}")
 
         # Victim Sex Pie
-        victim_sex_counts = filtered_area_df['Vict Sex'].value_counts().reset_index()
         victim_sex_counts.columns = ['Victim Sex', 'Count']
         victim_sex_pie = px.pie(victim_sex_counts, names='Victim Sex', values='Count',
                                 title=f"Victim Sex Distribution in {area_name}")
 
         # Victim Descent Pie
-        victim_descent_counts = filtered_area_df['Vict Descent'].value_counts().reset_index()
         victim_descent_counts.columns = ['Victim Descent', 'Count']
         descent_map = {
             'A': 'Other Asian', 'B': 'Black', 'C': 'Chinese', 'D': 'Cambodian',
@@ -76,18 +85,36 @@ def register_callbacks(app):
                                     title=f"Victim Descent Distribution in {area_name}")
 
         # Age Group Bar Chart
-        age_bins = [0, 18, 35, 50, 65, 100]
-        age_labels = ['0-18', '19-35', '36-50', '51-65', '66+']
-        filtered_area_df['Age Group'] = pd.cut(filtered_area_df['Vict Age'], bins=age_bins, labels=age_labels, right=False)
-        age_group_counts = filtered_area_df['Age Group'].value_counts().reset_index()
         age_group_counts.columns = ['Age Group', 'Count']
         victim_age_group_bar = px.bar(age_group_counts, x='Age Group', y='Count',
                                       title=f"Victim Age Group Distribution in {area_name}",
                                       color='Age Group',
                                       color_discrete_sequence=px.colors.qualitative.Set1)
+        clock.lap("figures")
+
+        # Only traces and titles change with the area: later updates are patches
+        return tuple(figure_update(fig) for fig in (area_crime_type_bar, hourly_crime_area_bar,
+                                                     victim_sex_pie, victim_descent_pie, victim_age_group_bar))
 
-        return (area_crime_type_bar, area_crime_time_series, hourly_crime_area_bar,
-                victim_sex_pie, victim_descent_pie, victim_age_group_bar)
+    @app.callback(
+        Output('area-crime-time-series', 'figure'),
+        [Input('area-name-dropdown', 'value'),
+         Input('area-trend-granularity', 'value'),
+         Input('area-trend-rolling', 'value')]
+    )
+    def update_area_trend(area_name, granularity, rolling):
+        # Served from the pre-aggregated rollup: real dates on the x axis, no raw-row groupby
+        clock = StageClock()
+        time_series = crime_store.snapshot().rollup.trend(granularity, [area_name], rolling=bool(rolling))
+        clock.lap("rollup")
+        time_series['Period'] = compact_dates(time_series['Period'])
+        y = ['Count', 'Rolling Avg'] if rolling else 'Count'
+        fig = px.line(time_series, x='Period', y=y,
+                      title=f"Crime Trends in {area_name} ({granularity})",
+                      labels={'Period': granularity, 'value': 'Count'})
+        fig.update_xaxes(type='date')
+        clock.lap("figures")
+        return figure_update(fig)
 
 # Run the app
 if __name__ == '__main__':
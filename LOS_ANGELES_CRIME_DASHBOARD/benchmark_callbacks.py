@@ -0,0 +1,239 @@
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+import numpy as np
+
+from synthetic_data import CRIME_DATA_FILE, PROFILE_DATA_FILE, generate
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Read by the dashboard modules (relative to the working directory) besides the two CSVs
+ASSETS = ["mocode_data.csv", "severity_rules.json", "severity_regressor.pkl", "nltk_data",
+          "text_embeddings_for_severity_score.npy", "case_index"]
+EMBEDDING_DIM = 768
+
+
+# ------------------- Stubs -------------------
+class StubEncoder:
+    """Stands in for SentenceTransformer: deterministic unit vectors from a hash of the text."""
+
+    def __init__(self, model_name=None, *args, **kwargs):
+        self.model_name = model_name
+
+    def get_sentence_embedding_dimension(self):
+        return EMBEDDING_DIM
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, **kwargs):
+        vectors = np.empty((len(sentences), EMBEDDING_DIM), dtype=np.float32)
+        for i, text in enumerate(sentences):
+            seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+            vectors[i] = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def stub_llm(latency):
+    def call_model(prompt, api_key):
+        time.sleep(latency)
+        return "1. Top crime types: ...\n2. Common locations: ...\n3. Victim demographics: ..."
+
+    def refine_score_with_llm(crime_text, model_score):
+        time.sleep(latency)
+        return round(model_score, 2), ["Stay alert.", "Lock your vehicle.", "Report suspicious activity."]
+
+    return call_model, refine_score_with_llm
+
+
+# ------------------- Measurement -------------------
+def _status_mb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def rss_mb():
+    return _status_mb("VmRSS:")
+
+
+def peak_rss_mb():
+    # VmHWM, not ru_maxrss: ru_maxrss survives exec, so a child would report the parent's peak
+    return _status_mb("VmHWM:")
+
+
+def profile_call(fn, make_args, repeat):
+    """Wall time over `repeat` calls (plus the first, cold one) and tracemalloc peak of one call."""
+    args, kwargs = make_args(0)
+    t0 = time.perf_counter()
+    fn(*args, **kwargs)
+    cold = time.perf_counter() - t0
+
+    times = []
+    for i in range(1, repeat + 1):
+        args, kwargs = make_args(i)
+        t0 = time.perf_counter()
+        fn(*args, **kwargs)
+        times.append(time.perf_counter() - t0)
+
+    # Separate call: tracing allocations slows the timed ones down
+    args, kwargs = make_args(repeat + 1)
+    tracemalloc.start()
+    fn(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times = np.array(times) * 1000
+    return {"calls": repeat, "cold_ms": cold * 1000, "mean_ms": float(times.mean()),
+            "p50_ms": float(np.percentile(times, 50)), "p95_ms": float(np.percentile(times, 95)),
+            "min_ms": float(times.min()), "peak_alloc_mb": peak / 2**20, "rss_mb": rss_mb()}
+
+
+def find_callback(app, name):
+    for spec in app.callback_map.values():
+        fn = spec["callback"]
+        if getattr(fn, "__wrapped__", fn).__name__ == name:
+            return fn.__wrapped__
+    raise KeyError(f"No callback named {name}")
+
+
+# ------------------- One dataset (run in its own process) -------------------
+def run_dataset(data_dir, repeat, llm_latency):
+    """Benchmark every callback against the CSVs in data_dir; returns the result record.
+
+    Modules load their data on import from the working directory, so each
+    dataset is run in a fresh process with data_dir as the working directory.
+    """
+    for name in ASSETS:
+        src, dst = os.path.join(SCRIPT_DIR, name), os.path.join(data_dir, name)
+        if os.path.exists(src) and not os.path.lexists(dst):
+            os.symlink(src, dst)
+    # NLPC5 loads this unconditionally (it is only used to train a missing regressor)
+    placeholder = os.path.join(data_dir, "text_embeddings_for_severity_score.npy")
+    if not os.path.lexists(placeholder):
+        np.save(placeholder, np.zeros((1, EMBEDDING_DIM), dtype=np.float32))
+    os.chdir(data_dir)
+    sys.path.insert(0, SCRIPT_DIR)
+    sys.modules["sentence_transformers"] = types.SimpleNamespace(SentenceTransformer=StubEncoder)
+
+    result = {"data_dir": data_dir, "stages": {}, "callbacks": {}}
+    t0 = time.perf_counter()
+    from crime_queries import IncidentFilter, incident_queries
+    from crime_store import crime_store
+    result["stages"]["load_crime_store_s"] = time.perf_counter() - t0
+    snapshot = crime_store.snapshot()
+    result["rows"] = snapshot.rows
+
+    t0 = time.perf_counter()
+    import NLPC5
+    result["stages"]["load_severity_model_s"] = time.perf_counter() - t0
+
+    import dash
+    import summarisation_dash
+    from area_crime_analysis import register_callbacks
+    from comparitive_crime_analysis import register_callbacks_compare
+    from hotspot_detection import register_callbacks_hotspots
+
+    call_model, refine_score_with_llm = stub_llm(llm_latency)
+    summarisation_dash.call_model = call_model
+    NLPC5.refine_score_with_llm = refine_score_with_llm
+
+    app = dash.Dash(__name__, suppress_callback_exceptions=True)
+    register_callbacks(app)
+    register_callbacks_compare(app)
+    register_callbacks_hotspots(app)
+    summarisation_dash.register_callbacks_summariser(app)
+
+    # Through the configured backend, so CRIME_QUERY_BACKEND=duckdb never loads the frame
+    queries = incident_queries()
+    top_areas = list(queries.count_by("AREA NAME", IncidentFilter(), limit=2)["AREA NAME"])
+    start, end = (str(d.date()) for d in snapshot.date_range)
+    top_crime = queries.count_by("Crm Cd Desc", IncidentFilter(), limit=1)["Crm Cd Desc"][0]
+
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+    def severity_inputs(i):
+        # Vary month and day (clean_text drops digits, so the age alone would not)
+        # so score_profile's cache never answers for the model
+        return (), dict(vict_age=20 + i % 60, vict_sex="F", vict_descent="H", crime_desc="ROBBERY",
+                        premis="STREET", area=top_areas[0], time_day="Night", day=days[i // 12 % 7],
+                        month=1 + i % 12, year=2024, mocodes="0344 1822", weapon="HAND GUN")
+
+    benchmarks = {
+        "update_area_graphs": lambda i: ((top_areas[0],), {}),
+        "update_area_trend": lambda i: ((top_areas[0], "Month", []), {}),
+        "update_comparison_graphs": lambda i: ((top_areas,), {}),
+        "update_comparison_trend": lambda i: ((top_areas, "Week", ["Rolling average"]), {}),
+        "update_charts": lambda i: ((start, end, [top_crime], None, None), {}),
+        "generate_summary": lambda i: ((1, top_areas[0], 1), {}),
+    }
+    for name, make_args in benchmarks.items():
+        result["callbacks"][name] = profile_call(find_callback(app, name), make_args, repeat)
+    result["callbacks"]["predict_severity_from_inputs"] = profile_call(
+        NLPC5.predict_severity_from_inputs, severity_inputs, repeat)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+# ------------------- Entry point -------------------
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and memory-profile the dashboard callbacks")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--data-dir", default="synthetic_data",
+                        help="synthetic CSVs are generated into <data-dir>/<rows>/ when missing")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per stub LLM call")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--run-dataset", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_dataset:
+        result = run_dataset(os.path.abspath(args.run_dataset), args.repeat, args.llm_latency)
+        with open(args.output, "w") as f:
+            json.dump(result, f)
+        return
+
+    results = []
+    for rows in args.rows:
+        data_dir = os.path.abspath(os.path.join(args.data_dir, str(rows)))
+        if not all(os.path.exists(os.path.join(data_dir, f)) for f in (CRIME_DATA_FILE, PROFILE_DATA_FILE)):
+            generate(rows, data_dir, args.seed)
+        result_path = os.path.join(data_dir, "result.json")
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--run-dataset", data_dir,
+                        "--repeat", str(args.repeat), "--llm-latency", str(args.llm_latency),
+                        "--output", result_path], check=True)
+        with open(result_path) as f:
+            result = json.load(f)
+        results.append(result)
+
+        print(f"\n📊 {result['rows']:,} incidents (peak RSS {result['peak_rss_mb']:.0f} MB)")
+        for name, stats in result["callbacks"].items():
+            print(f"  {name:<30} mean {stats['mean_ms']:9.1f} ms   p95 {stats['p95_ms']:9.1f} ms   "
+                  f"cold {stats['cold_ms']:9.1f} ms   peak alloc {stats['peak_alloc_mb']:8.1f} MB")
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "git_revision": git_revision(),
+              "python": platform.python_version(), "platform": platform.platform(),
+              "cpu_count": os.cpu_count(), "repeat": args.repeat, "llm_latency_s": args.llm_latency,
+              "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from crime_profiles import build_profiles, generate_crime_profile, profile_arguments
+from synthetic_data import _mocode_pool, make_incidents
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def per_row(crime_data):
+    """The row-at-a-time baseline: derive the arguments, then generate_crime_profile per row."""
+    return profile_arguments(crime_data).apply(lambda row: generate_crime_profile(**row), axis=1)
+
+
+# ------------------- Benchmark -------------------
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of generate_crime_profile vs build_profiles")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--reference-rows", type=int, default=50_000,
+                        help="rows built with the per-row generate_crime_profile (extrapolated to --rows)")
+    parser.add_argument("--mocode-lists", type=int, default=200_000,
+                        help="distinct MO code lists in the synthetic incidents")
+    parser.add_argument("--data", help="optional crime_data_cleaned_2020_present.csv to sample incidents from")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    if args.data:
+        text_columns = {c: str for c in ["Premis Desc", "Weapon Desc", "Mocodes", "Vict Sex", "Vict Descent"]}
+        incidents = pd.read_csv(args.data, dtype=text_columns)
+        incidents = incidents.sample(args.rows, replace=len(incidents) < args.rows,
+                                     random_state=42).reset_index(drop=True)
+    else:
+        rng = np.random.default_rng(42)
+        incidents = make_incidents(args.rows, rng, mocode_pool=_mocode_pool(rng, args.mocode_lists))
+    print(f"Incidents: {len(incidents):,}")
+
+    sample = incidents.iloc[:args.reference_rows]
+    reference, ref_secs = timed(per_row, sample)
+    ref_rate = len(sample) / ref_secs
+    print(f"{'generate_crime_profile (.apply)':<34} {ref_rate:>12,.0f} rows/s   "
+          f"~{len(incidents) / ref_rate:8.1f}s for {len(incidents):,} (extrapolated)")
+
+    for n_jobs in (1, args.n_jobs):
+        profiles, secs = timed(build_profiles, incidents, n_jobs=n_jobs)
+        parity = profiles.iloc[:len(sample)].tolist() == reference.tolist()
+        label = f"build_profiles[n_jobs={n_jobs}]"
+        print(f"{label:<34} {len(incidents) / secs:>12,.0f} rows/s   "
+              f"{secs:9.1f}s   speedup x{(len(incidents) / ref_rate) / secs:,.1f}   parity={parity}")
+        if not parity:
+            raise SystemExit("build_profiles output differs from generate_crime_profile")
+        del profiles
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from benchmark_callbacks import git_revision, peak_rss_mb
+from crime_queries import DuckDBBackend, IncidentFilter, PandasQueries, export_parquet
+from crime_rollups import GRANULARITIES
+from synthetic_data import CRIME_DATA_FILE, generate
+
+PARQUET_FILE = "crime_data.parquet"
+BACKENDS = ["pandas", "duckdb"]
+COUNT_COLUMNS = ["Crm Cd Desc", "Hour", "Vict Sex", "Vict Descent", "Crime Severity", "AREA NAME", "Premis Desc"]
+AGE_BINS, AGE_LABELS = [0, 18, 35, 50, 65, 100], ["0-18", "19-35", "36-50", "51-65", "66+"]
+# Downtown LA, roughly the view at the hotspot map's hover zoom
+ZOOM_BBOX = (-118.2637, 34.0372, -118.2237, 34.0672)
+
+
+# ------------------- Tab workloads -------------------
+# The queries each tab's callback runs for one interaction
+def area_tab(queries, areas, i):
+    in_area = IncidentFilter(areas=(areas[i % len(areas)],))
+    queries.count_by("Crm Cd Desc", in_area, limit=15)
+    for column in ("Hour", "Vict Sex", "Vict Descent"):
+        queries.count_by(column, in_area)
+    queries.count_binned("Vict Age", AGE_BINS, AGE_LABELS, in_area)
+
+
+def compare_tab(queries, areas, i):
+    for area in (areas[i % len(areas)], areas[(i + 1) % len(areas)]):
+        in_area = IncidentFilter(areas=(area,))
+        queries.count_by("Crm Cd Desc", in_area, limit=10)
+        queries.count_by("Crime Severity", in_area)
+        queries.count_by("Vict Descent", in_area)
+
+
+def hotspot_where(crime_types, dates, i):
+    return IncidentFilter(start=dates[0] + pd.Timedelta(days=30 * (i % 6)), end=dates[1],
+                          crime_types=tuple(crime_types[i % len(crime_types):][:3]), with_coords=True)
+
+
+def hotspot_tab(queries, crime_types, dates, i):
+    where = hotspot_where(crime_types, dates, i)
+    queries.rows(["LAT", "LON"], where)
+    queries.count_by("AREA NAME", where, limit=10)
+
+
+def hotspot_zoom(queries, crime_types, dates, i):
+    where = hotspot_where(crime_types, dates, i)
+    queries.rows(["LAT", "LON", "Crm Cd Desc", "Premis Desc", "DATE OCC"], replace(where, bbox=ZOOM_BBOX),
+                 limit=2_000)
+
+
+# ------------------- One backend (run in its own process) -------------------
+def run_backend(backend, data_dir, repeat):
+    """Load the data the way the app would, then time each tab's queries.
+
+    Each backend runs in a fresh process so its peak RSS is its own and a
+    pandas run that does not fit in memory is reported as a failure.
+    """
+    os.chdir(data_dir)
+    result = {"backend": backend, "tabs": {}}
+    t0 = time.perf_counter()
+    # The store the app builds at import for CRIME_QUERY_BACKEND (set by main()):
+    # the whole CSV for pandas, only option lists and the rollup for duckdb
+    from crime_store import crime_store
+    if backend == "pandas":
+        chunks = crime_store.snapshot().chunks
+        make_queries = lambda: PandasQueries(chunks)  # noqa: E731 (what incident_queries() returns)
+    else:
+        duckdb_backend = DuckDBBackend(os.path.join(data_dir, PARQUET_FILE))
+        make_queries = duckdb_backend.queries
+    result["load_s"] = time.perf_counter() - t0
+
+    # Option lists: the same for both backends, from the DuckDB scan (cheap)
+    options = DuckDBBackend(os.path.join(data_dir, PARQUET_FILE)).queries()
+    areas = list(options.count_by("AREA NAME", IncidentFilter())["AREA NAME"])
+    crime_types = list(options.count_by("Crm Cd Desc", IncidentFilter())["Crm Cd Desc"])
+    dates = tuple(pd.Timestamp(d) for d in options.cursor.execute(
+        'SELECT MIN("DATE OCC"), MAX("DATE OCC") FROM incidents').fetchone())
+
+    workloads = {
+        "area": lambda q, i: area_tab(q, areas, i),
+        "compare": lambda q, i: compare_tab(q, areas, i),
+        "hotspots": lambda q, i: hotspot_tab(q, crime_types, dates, i),
+        "hotspots_zoom": lambda q, i: hotspot_zoom(q, crime_types, dates, i),
+    }
+    for name, workload in workloads.items():
+        t0 = time.perf_counter()
+        workload(make_queries(), 0)
+        cold = time.perf_counter() - t0
+        times = []
+        for i in range(1, repeat + 1):
+            t0 = time.perf_counter()
+            workload(make_queries(), i)
+            times.append(time.perf_counter() - t0)
+        times = np.array(times) * 1000
+        result["tabs"][name] = {"cold_ms": cold * 1000, "mean_ms": float(times.mean()),
+                                "p50_ms": float(np.percentile(times, 50)), "p95_ms": float(np.percentile(times, 95))}
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+# ------------------- Parity check -------------------
+def snapshot_mismatches(expected, actual):
+    """Names of the snapshot fields (option lists, date range, row count, rollup trends) that differ."""
+    fields = [f for f in ("rows", "areas", "crime_types", "premises", "date_range")
+              if getattr(expected, f) != getattr(actual, f)]
+    for granularity in GRANULARITIES:
+        if not same_frames(expected.rollup.trend(granularity), actual.rollup.trend(granularity), ordered=False):
+            fields.append(f"rollup[{granularity}]")
+    return fields
+
+
+def random_filter(rng, areas, crime_types, premises, dates):
+    def some(values, most):
+        if rng.random() < 0.4:
+            return None
+        return tuple(str(v) for v in rng.choice(values, size=rng.integers(1, most + 1), replace=False))
+
+    start = dates[0] + pd.Timedelta(days=int(rng.integers(0, 900))) if rng.random() < 0.5 else None
+    end = (start or dates[0]) + pd.Timedelta(days=int(rng.integers(1, 900))) if rng.random() < 0.5 else None
+    bbox = (-118.35, 33.95, -118.15, 34.10) if rng.random() < 0.2 else None
+    return IncidentFilter(areas=some(areas, 2), start=start, end=end, crime_types=some(crime_types, 3),
+                          premises=some(premises, 3), bbox=bbox, with_coords=bool(rng.random() < 0.3))
+
+
+def same_frames(expected, actual, ordered=True):
+    expected, actual = expected.reset_index(drop=True), actual.reset_index(drop=True)
+    if not ordered:
+        expected = expected.sort_values(list(expected.columns), ignore_index=True)
+        actual = actual.sort_values(list(actual.columns), ignore_index=True)
+    try:
+        pd.testing.assert_frame_equal(expected, actual, check_dtype=False)
+        return True
+    except AssertionError:
+        return False
+
+
+def check(data_dir, filters, seed):
+    """Compare DuckDBCrimeStore's snapshot with crime_store's, then run random filters through pandas and
+    DuckDB (Parquet and CSV); True when everything matches."""
+    os.chdir(data_dir)
+    from crime_store import DuckDBCrimeStore, crime_store
+    snapshot = crime_store.snapshot()
+    reference = PandasQueries(snapshot.crime_data)
+    sources = {"parquet": DuckDBBackend(os.path.join(data_dir, PARQUET_FILE)).queries(),
+               "csv": DuckDBBackend(os.path.join(data_dir, CRIME_DATA_FILE)).queries()}
+    dates = (snapshot.crime_data["DATE OCC"].min(), snapshot.crime_data["DATE OCC"].max())
+    rng = np.random.default_rng(seed)
+
+    mismatches = 0
+    for source in (PARQUET_FILE, CRIME_DATA_FILE):
+        differ = snapshot_mismatches(snapshot, DuckDBCrimeStore(os.path.join(data_dir, source)).snapshot())
+        mismatches += len(differ)
+        if differ:
+            print(f"❌ DuckDBCrimeStore({source}) differs from crime_store in {', '.join(differ)}")
+
+    for n in range(filters):
+        where = random_filter(rng, snapshot.areas, snapshot.crime_types, snapshot.premises, dates)
+        column = COUNT_COLUMNS[n % len(COUNT_COLUMNS)]
+        expected = {"count_by": reference.count_by(column, where, limit=10 if n % 2 else None),
+                    "count_binned": reference.count_binned("Vict Age", AGE_BINS, AGE_LABELS, where),
+                    "rows": reference.rows(["DR_NO", "DATE OCC", "LAT", "LON"], where)}
+        for source, queries in sources.items():
+            actual = {"count_by": queries.count_by(column, where, limit=10 if n % 2 else None),
+                      "count_binned": queries.count_binned("Vict Age", AGE_BINS, AGE_LABELS, where),
+                      "rows": queries.rows(["DR_NO", "DATE OCC", "LAT", "LON"], where)}
+            for query in expected:
+                if not same_frames(expected[query], actual[query], ordered=query != "rows"):
+                    mismatches += 1
+                    print(f"❌ {source} {query} ({column}) differs for {where}")
+    print(f"{'✅' if not mismatches else '❌'} snapshot and {filters} filters × {len(sources)} DuckDB sources: "
+          f"{mismatches} mismatches")
+    return mismatches == 0
+
+
+# ------------------- Entry point -------------------
+def prepare(rows, data_dir, seed):
+    """Synthetic incident CSV (no profiles: only the incident queries are measured) and its Parquet copy."""
+    if not os.path.exists(os.path.join(data_dir, CRIME_DATA_FILE)):
+        generate(rows, data_dir, seed, profiles=False)
+    if not os.path.exists(os.path.join(data_dir, PARQUET_FILE)):
+        export_parquet(os.path.join(data_dir, CRIME_DATA_FILE), os.path.join(data_dir, PARQUET_FILE))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the pandas and DuckDB incident query backends")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--data-dir", default="synthetic_data",
+                        help="synthetic data is generated into <data-dir>/<rows>/ when missing")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="query_backend_results.json")
+    parser.add_argument("--check", action="store_true",
+                        help="only check that both backends return the same results (exit 1 if not)")
+    parser.add_argument("--filters", type=int, default=50, help="random filters tried by --check")
+    parser.add_argument("--run-backend", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.check:
+        data_dir = os.path.abspath(os.path.join(args.data_dir, str(args.rows[0])))
+        prepare(args.rows[0], data_dir, args.seed)
+        sys.exit(0 if check(data_dir, args.filters, args.seed) else 1)
+
+    if args.run_backend:
+        result = run_backend(args.run_backend, os.path.abspath(args.data_dir), args.repeat)
+        with open(args.output, "w") as f:
+            json.dump(result, f)
+        return
+
+    results = []
+    for rows in args.rows:
+        data_dir = os.path.abspath(os.path.join(args.data_dir, str(rows)))
+        prepare(rows, data_dir, args.seed)
+        for backend in BACKENDS:
+            result_path = os.path.join(data_dir, f"{backend}_result.json")
+            env = {**os.environ, "CRIME_QUERY_BACKEND": backend,
+                   "CRIME_DUCKDB_SOURCE": os.path.join(data_dir, PARQUET_FILE)}
+            run = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-backend", backend,
+                                  "--data-dir", data_dir, "--repeat", str(args.repeat), "--output", result_path],
+                                 env=env)
+            if run.returncode != 0:
+                # e.g. killed by the OOM killer (-9) when the frame does not fit in memory
+                result = {"backend": backend, "failed": True, "returncode": run.returncode}
+            else:
+                with open(result_path) as f:
+                    result = json.load(f)
+            result["rows"] = rows
+            results.append(result)
+
+            if result.get("failed"):
+                print(f"\n💥 {backend} on {rows:,} incidents failed (exit code {run.returncode})")
+                continue
+            print(f"\n📊 {backend} on {rows:,} incidents: load {result['load_s']:.1f}s, "
+                  f"peak RSS {result['peak_rss_mb']:.0f} MB")
+            for tab, stats in result["tabs"].items():
+                print(f"  {tab:<15} mean {stats['mean_ms']:9.1f} ms   p95 {stats['p95_ms']:9.1f} ms   "
+                      f"cold {stats['cold_ms']:9.1f} ms")
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "git_revision": git_revision(),
+              "python": platform.python_version(), "platform": platform.platform(),
+              "cpu_count": os.cpu_count(), "repeat": args.repeat, "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from text_cleaning import HAS_PYARROW, clean_text, clean_text_bulk
+
+# ------------------- Synthetic profiles -------------------
+AGE_GROUPS = ["child", "adult", "senior"]
+SEXES = ["Male", "Female", "Unknown"]
+DESCENTS = ["Hispanic/Latin/Mexican", "White", "Black", "Other", "Other Asian", "Korean"]
+CRIMES = ["vehicle - stolen", "battery - simple assault", "burglary from vehicle",
+          "theft of identity", "assault with deadly weapon, aggravated assault",
+          "robbery", "criminal homicide", "vandalism - felony ($400 & over, all church vandalisms)"]
+PREMISES = ["street", "single family dwelling", "multi-unit dwelling (apartment, duplex, etc)",
+            "parking lot", "sidewalk", "other business"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+AREAS = ["Central", "77th Street", "Pacific", "Southwest", "Hollywood", "N Hollywood"]
+MO_TEXT = ["stranger", "removes vic property", "suspect cannot be identified",
+           "hit-hit w/ weapon", "gonna/wanna statements made", "unknown(9999)"]
+WEAPONS = ["unknown", "strong-arm (hands, fist, feet or bodily force)", "hand gun", "knife with blade 6inches or less"]
+
+
+def make_profiles(n, seed=42):
+    rng = np.random.default_rng(seed)
+
+    def pick(values):
+        return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+
+    ages = rng.integers(1, 95, n)
+    years = rng.integers(2020, 2025, n)
+    parts = zip(pick(AGE_GROUPS), ages, pick(SEXES), pick(DESCENTS), pick(CRIMES), pick(PREMISES),
+                pick(MONTHS), pick(DAYS), years, pick(AREAS), pick(MO_TEXT), pick(WEAPONS))
+    return pd.Series([
+        f"The victim was an {g} individual (age {a}), identified as {s} of {d} descent. "
+        f"They were involved in a reported case of {c}, which occurred at a {p}. "
+        f"The incident took place during the night hours, in {m} (Winter season), on a {dy} in the year {y}, within the {ar} area. "
+        f"The suspect's behavior included: {mo}, and the weapon used was: {w}."
+        for g, a, s, d, c, p, m, dy, y, ar, mo, w in parts
+    ])
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+# ------------------- Benchmark -------------------
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of clean_text vs clean_text_bulk")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--reference-rows", type=int, default=20_000,
+                        help="rows cleaned with the per-row clean_text (extrapolated to --rows)")
+    parser.add_argument("--data", help="optional crimeProfileText_data.csv to sample profiles from")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    if args.data:
+        texts = pd.read_csv(args.data, usecols=["Crime_Profile_Text"])["Crime_Profile_Text"].fillna('')
+        texts = texts.sample(args.rows, replace=len(texts) < args.rows, random_state=42).reset_index(drop=True)
+    else:
+        texts = make_profiles(args.rows)
+    print(f"Profiles: {len(texts):,}")
+
+    sample = texts.iloc[:args.reference_rows]
+    reference, ref_secs = timed(sample.apply, clean_text)
+    ref_rate = len(sample) / ref_secs
+    print(f"{'clean_text (.apply)':<28} {ref_rate:>12,.0f} rows/s   "
+          f"~{len(texts) / ref_rate:8.1f}s for {len(texts):,} (extrapolated)")
+
+    engines = ["python"] + (["pyarrow"] if HAS_PYARROW else [])
+    for engine in engines:
+        for n_jobs in (1, args.n_jobs):
+            cleaned, secs = timed(clean_text_bulk, texts, engine=engine, n_jobs=n_jobs)
+            parity = cleaned.iloc[:len(sample)].tolist() == reference.tolist()
+            label = f"clean_text_bulk[{engine}, n_jobs={n_jobs}]"
+            print(f"{label:<28} {len(texts) / secs:>12,.0f} rows/s   "
+                  f"{secs:9.1f}s   speedup x{(len(texts) / ref_rate) / secs:,.1f}   parity={parity}")
+            if not parity:
+                raise SystemExit("clean_text_bulk output differs from clean_text")
+            del cleaned
+
+
+if __name__ == "__main__":
+    main()
@@ -3,29 +3,37 @@ from dash import html, dcc, Input, Output
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-
-# Load data
-crime_data = pd.read_csv("./crime_data_cleaned_2020_present.csv")
-crime_data['Month'] = crime_data['Month'].astype(str)
+from crime_queries import IncidentFilter, incident_queries
+from crime_rollups import GRANULARITIES
+from crime_store import crime_store
+from metrics import StageClock
+from figure_payloads import compact_dates, figure_update
 
 # Initialize app
 app = dash.Dash(__name__)
 app.title = "Crime Dashboard"
 
 # Layout function
-def app_layout(crime_data):
+def app_layout(snapshot):
     return html.Div([
         html.H1("Compare Crime Statistics Between Two Areas"),
         
         html.Label("Select Two Areas to Compare:"),
         dcc.Dropdown(
             id='area-dropdown-compare',
-            options=[{'label': area, 'value': area} for area in sorted(crime_data['AREA NAME'].unique())],
-            value=[crime_data['AREA NAME'].unique()[0], crime_data['AREA NAME'].unique()[1]],
+            options=[{'label': area, 'value': area} for area in snapshot.areas],
+            value=list(snapshot.first_areas),
             multi=True
         ),
         
         html.Br(),
+        dcc.RadioItems(
+            id='trend-granularity-compare',
+            options=GRANULARITIES,
+            value='Month',
+            inline=True
+        ),
+        dcc.Checklist(id='trend-rolling-compare', options=['Rolling average'], value=[], inline=True),
         dcc.Graph(id='crime-trend-comparison'),
         dcc.Graph(id='crime-type-comparison'),
         dcc.Graph(id='crime-severity-ratio-comparison'),
@@ -36,6 +44,37 @@ def app_layout(crime_data):
 def register_callbacks_compare(app):
     @app.callback(
         Output('crime-trend-comparison', 'figure'),
+        Input('area-dropdown-compare', 'value'),
+        Input('trend-granularity-compare', 'value'),
+        Input('trend-rolling-compare', 'value')
+    )
+    def update_comparison_trend(selected_areas, granularity, rolling):
+        if not selected_areas or len(selected_areas) != 2:
+            return go.Figure()
+
+        area_colors = {
+            selected_areas[0]: "#1f77b4",  # soft blue
+            selected_areas[1]: "#ff7f0e"   # soft orange
+        }
+
+        # Crime trends from the pre-aggregated rollup (chronological, per year)
+        clock = StageClock()
+        trends = crime_store.snapshot().rollup.trend(granularity, selected_areas, rolling=bool(rolling))
+        clock.lap("rollup")
+        trends['Period'] = compact_dates(trends['Period'])
+        trends_fig = px.line(
+            trends,
+            x='Period', y='Rolling Avg' if rolling else 'Count', color='AREA NAME',
+            title=f'{granularity} Crime Trends Comparison',
+            labels={'Count': 'Number of Crimes', 'Rolling Avg': 'Number of Crimes (rolling avg)',
+                    'Period': granularity},
+            color_discrete_map=area_colors
+        )
+        trends_fig.update_xaxes(type='date')
+        clock.lap("figures")
+        return figure_update(trends_fig)
+
+    @app.callback(
         Output('crime-type-comparison', 'figure'),
         Output('crime-severity-ratio-comparison', 'figure'),
         Output('descent-comparison', 'figure'),
@@ -43,30 +82,27 @@ def register_callbacks_compare(app):
     )
     def update_comparison_graphs(selected_areas):
         if not selected_areas or len(selected_areas) != 2:
-            return go.Figure(), go.Figure(), go.Figure(), go.Figure()
+            return go.Figure(), go.Figure(), go.Figure()
 
-        area_1_df = crime_data[crime_data['AREA NAME'] == selected_areas[0]]
-        area_2_df = crime_data[crime_data['AREA NAME'] == selected_areas[1]]
+        clock = StageClock()
+        queries = incident_queries()
+        area_1 = IncidentFilter(areas=(selected_areas[0],))
+        area_2 = IncidentFilter(areas=(selected_areas[1],))
 
         area_colors = {
             selected_areas[0]: "#1f77b4",  # soft blue
             selected_areas[1]: "#ff7f0e"   # soft orange
         }
 
-        # Monthly crime trends
-        trend_data = crime_data[crime_data['AREA NAME'].isin(selected_areas)]
-        monthly_trends = trend_data.groupby(['AREA NAME', 'Month'])['DR_NO'].count().reset_index()
-        monthly_trends_fig = px.line(
-            monthly_trends,
-            x='Month', y='DR_NO', color='AREA NAME',
-            title='Monthly Crime Trends Comparison',
-            labels={'DR_NO': 'Number of Crimes'},
-            color_discrete_map=area_colors
-        )
+        top_crimes_area_1 = queries.count_by('Crm Cd Desc', area_1, limit=10)
+        top_crimes_area_2 = queries.count_by('Crm Cd Desc', area_2, limit=10)
+        severity_count_area_1 = queries.count_by('Crime Severity', area_1)
+        severity_count_area_2 = queries.count_by('Crime Severity', area_2)
+        descent_area_1 = queries.count_by('Vict Descent', area_1)
+        descent_area_2 = queries.count_by('Vict Descent', area_2)
+        clock.lap("filter")
 
         # Top 10 Crime Types Comparison
-        top_crimes_area_1 = area_1_df['Crm Cd Desc'].value_counts().head(10).reset_index()
-        top_crimes_area_2 = area_2_df['Crm Cd Desc'].value_counts().head(10).reset_index()
         top_crimes_area_1.columns = ['Crime Type', 'Count']
         top_crimes_area_2.columns = ['Crime Type', 'Count']
 
@@ -83,8 +119,6 @@ def register_callbacks_compare(app):
 
 
         # Crime Severity Ratio Comparison
-        severity_count_area_1 = area_1_df['Crime Severity'].value_counts().reset_index()
-        severity_count_area_2 = area_2_df['Crime Severity'].value_counts().reset_index()
         severity_count_area_1.columns = ['Severity', 'Count']
         severity_count_area_2.columns = ['Severity', 'Count']
 
@@ -108,10 +142,13 @@ def register_callbacks_compare(app):
             'S': 'Samoan', 'U': 'Hawaiian', 'V': 'Vietnamese', 'W': 'White', 'X': 'Unknown', 'Z': 'Asian Indian'
         }
 
-        descent_area_1 = area_1_df['Vict Descent'].map(descent_map).value_counts().reset_index()
-        descent_area_2 = area_2_df['Vict Descent'].map(descent_map).value_counts().reset_index()
         descent_area_1.columns = ['Victim Descent', 'Count']
         descent_area_2.columns = ['Victim Descent', 'Count']
+        # Codes outside the map are dropped, as value_counts() drops NaN
+        descent_area_1['Victim Descent'] = descent_area_1['Victim Descent'].map(descent_map)
+        descent_area_2['Victim Descent'] = descent_area_2['Victim Descent'].map(descent_map)
+        descent_area_1 = descent_area_1.dropna()
+        descent_area_2 = descent_area_2.dropna()
 
         descent_combined = pd.concat([
             descent_area_1.assign(Area=selected_areas[0]),
@@ -124,11 +161,12 @@ def register_callbacks_compare(app):
             title='Victim Descent Comparison Between Areas',
             color_discrete_map=area_colors
         )
+        clock.lap("figures")
 
-        return monthly_trends_fig, top_crimes_fig, severity_ratio_fig, descent_fig
+        return figure_update(top_crimes_fig), figure_update(severity_ratio_fig), figure_update(descent_fig)
 
 # Set layout
-app.layout = app_layout(crime_data)
+app.layout = app_layout(crime_store.snapshot())
 
 # Register callbacks
 register_callbacks_compare(app)
@@ -1,78 +1,122 @@
 import dash
 from dash import dcc, html
 import os
+from functools import lru_cache
 
 from area_crime_analysis import app1_layout, register_callbacks as register_callbacks_app1
 from comparitive_crime_analysis import app_layout, register_callbacks_compare as register_callbacks_app2
 from hotspot_detection import get_layout, register_callbacks_hotspots as register_callbacks_hotspots
 from severity_score_2 import score_app_layout2, register_callbacks_severity
-from NLPC5 import predict_severity_from_inputs
+from NLPC5 import predict_severity_from_inputs, find_similar_cases
 from summarisation_dash import create_layout_summariser, register_callbacks_summariser
-import pandas as pd
 import dash_bootstrap_components as dbc
+from crime_store import admin_authorized, crime_store, register_admin_routes
+from metrics import register_metrics
+from lazy_tabs import register_tab_callbacks, tab_panes
 
 
 
-crime_data = pd.read_csv("./crime_data_cleaned_2020_present.csv")
-crime_data['Month'] = crime_data['Month'].astype(str)
-
-
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.SANDSTONE], suppress_callback_exceptions=True)
 
 register_callbacks_app1(app)
 register_callbacks_app2(app)
 register_callbacks_hotspots(app)
-register_callbacks_severity(app, predict_severity_from_inputs)
+register_callbacks_severity(app, predict_severity_from_inputs, find_similar_cases)
 register_callbacks_summariser(app)
 
+# Hot reload: new delta CSVs in crime_store.delta_dir are picked up by the
+# watcher or on POST /admin/reload, without restarting the server. The watcher
+# runs below for the dev server; under gunicorn it runs in the master, which
+# then rolls its workers over (gunicorn.conf.py).
+register_admin_routes(app.server, crime_store)
+crime_store.ingest_pending()
+
+# Per-callback counts, latency/payload histograms, exceptions and stage
+# timings at GET /metrics (Prometheus text format); sampling profiler at
+# POST /admin/profiler
+register_metrics(app, admin_authorized)
+
+
+# Tab content is rendered the first time its tab is selected instead of being
+# shipped in the initial page, then kept mounted so switching tabs keeps its
+# filters, figures and severity history (lazy_tabs.py); each tab is built once
+# per data version
+TABS = {
+    'area': ('Area Crime Analysis', app1_layout),
+    'compare': ('Comparitive Crime Analysis', lambda: app_layout(crime_store.snapshot())),
+    'hotspots': ('GEO HOTSPOTS', get_layout),
+    'severity': ('Crime Severity Analyzer', score_app_layout2),
+    'summariser': ('Crime Summarizer', create_layout_summariser),
+}
+DEFAULT_TAB = 'area'
+
+
+@lru_cache(maxsize=len(TABS))
+def tab_layout(tab, version):
+    return TABS[tab][1]()
 
 
-app.layout = html.Div([
-    html.Div([
+render_tab = register_tab_callbacks(app, 'main-tabs', TABS, lambda tab: tab_layout(tab, crime_store.version))
+
+
+@lru_cache(maxsize=1)
+def layout_for_version(version):
+    return html.Div([
         html.Div([
-            html.Img(
-                src="./assets/police-badge.png",
-                style={
-                    'height': '40px',
-                    'marginRight': '15px'
-                }
-            ),
             html.Div([
-                html.H2("Los Angeles Crime Intelligence Dashboard", style={
-                    'fontSize': '22px',
-                    'margin': '0',
-                    'color': '#ffffff',
-                    'fontWeight': 'bold'
-                }),
-                html.P("Explore trends, compare areas, predict crime severity, and locate hotspots.", style={
-                    'fontSize': '13px',
-                    'margin': '0',
-                    'color': '#dcdcdc'
-                })
-            ])
+                html.Img(
+                    src="./assets/police-badge.png",
+                    style={
+                        'height': '40px',
+                        'marginRight': '15px'
+                    }
+                ),
+                html.Div([
+                    html.H2("Los Angeles Crime Intelligence Dashboard", style={
+                        'fontSize': '22px',
+                        'margin': '0',
+                        'color': '#ffffff',
+                        'fontWeight': 'bold'
+                    }),
+                    html.P("Explore trends, compare areas, predict crime severity, and locate hotspots.", style={
+                        'fontSize': '13px',
+                        'margin': '0',
+                        'color': '#dcdcdc'
+                    })
+                ])
+            ], style={
+                'display': 'flex',
+                'alignItems': 'center',
+                'justifyContent': 'center',
+                'gap': '15px'
+            })
         ], style={
-            'display': 'flex',
-            'alignItems': 'center',
-            'justifyContent': 'center',
-            'gap': '15px'
-        })
-    ], style={
-        'textAlign': 'center',
-        'padding': '10px',
-        'backgroundColor': '#1e3d59',  # dark steel blue
-        'borderBottom': '3px solid #58a4b0',  # teal/ice blue
-        'boxShadow': '0 2px 6px rgba(0,0,0,0.15)'
-    }),
-
-    dcc.Tabs([
-        dcc.Tab(label='Area Crime Analysis', children=[app1_layout()]),
-        dcc.Tab(label='Comparitive Crime Analysis', children=[app_layout(crime_data)]),
-        dcc.Tab(label='GEO HOTSPOTS', children=[get_layout()]),
-        dcc.Tab(label='Crime Severity Analyzer', children=[score_app_layout2()]),
-        dcc.Tab(label='Crime Summarizer', children=[create_layout_summariser()])
+            'textAlign': 'center',
+            'padding': '10px',
+            'backgroundColor': '#1e3d59',  # dark steel blue
+            'borderBottom': '3px solid #58a4b0',  # teal/ice blue
+            'boxShadow': '0 2px 6px rgba(0,0,0,0.15)'
+        }),
+
+        dcc.Tabs(id='main-tabs', value=DEFAULT_TAB, children=[
+            dcc.Tab(label=label, value=tab) for tab, (label, _) in TABS.items()
+        ]),
+        # Page-level state that must outlive any single tab
+        dcc.Store(id='crime_history_store', data=[]),
+        # The default tab ships with the page so the first render needs no round trip
+        html.Div(id='tab-content', children=tab_panes(TABS, DEFAULT_TAB, tab_layout(DEFAULT_TAB, version)))
     ])
-])
+
+
+def serve_layout():
+    # Evaluated per page load; rebuilt only when the data version changes so
+    # option lists and date bounds follow ingested deltas (tabs likewise)
+    return layout_for_version(crime_store.version)
+
+
+app.layout = serve_layout
 
 
 if __name__ == '__main__':
+    crime_store.start_watcher()
     app.run(host="0.0.0.0", port=8050, debug=False)
@@ -0,0 +1,236 @@
+import argparse
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from crime_rollups import LAPD_DATE_FORMAT
+
+try:
+    import duckdb
+    HAS_DUCKDB = True
+except ImportError:
+    HAS_DUCKDB = False
+
+# ------------------- Configuration -------------------
+# "pandas" (default) queries the in-memory crime_store snapshot; "duckdb" runs
+# the same aggregations in embedded DuckDB over Parquet/CSV files (and
+# crime_store then derives its option lists and rollup from DuckDB too)
+BACKEND = os.environ.get("CRIME_QUERY_BACKEND", "pandas")
+DUCKDB_SOURCE = os.environ.get("CRIME_DUCKDB_SOURCE", "crime_data.parquet")
+NUMERIC_COLUMNS = ["LAT", "LON", "Hour", "Vict Age"]
+# Whole numbers in the LAPD extract; pandas reads them as int64
+INTEGER_COLUMNS = ["Hour", "Vict Age"]
+
+
+@dataclass(frozen=True)
+class IncidentFilter:
+    """Which incidents a query covers; None means no constraint.
+
+    start/end bound DATE OCC inclusively, bbox is (min_lon, min_lat, max_lon,
+    max_lat) and with_coords drops incidents without LAT/LON.
+    """
+    areas: tuple = None
+    start: pd.Timestamp = None
+    end: pd.Timestamp = None
+    crime_types: tuple = None
+    premises: tuple = None
+    bbox: tuple = None
+    with_coords: bool = False
+
+
+def _sort_counts(counts, column):
+    # Largest first; ties by value so both backends agree on the order
+    return (counts.sort_values([column], kind="stable").sort_values("Count", ascending=False, kind="stable")
+            .reset_index(drop=True))
+
+
+# ============================
+# 🐼 pandas backend
+# ============================
+def _mask(df, where):
+    mask = np.ones(len(df), dtype=bool)
+    if where.areas is not None:
+        mask &= df["AREA NAME"].isin(where.areas).to_numpy()
+    if where.start is not None:
+        mask &= (df["DATE OCC"] >= where.start).to_numpy()
+    if where.end is not None:
+        mask &= (df["DATE OCC"] <= where.end).to_numpy()
+    if where.crime_types is not None:
+        mask &= df["Crm Cd Desc"].isin(where.crime_types).to_numpy()
+    if where.premises is not None:
+        mask &= df["Premis Desc"].isin(where.premises).to_numpy()
+    if where.with_coords or where.bbox is not None:
+        mask &= (df["LAT"].notna() & df["LON"].notna()).to_numpy()
+    if where.bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = where.bbox
+        mask &= (df["LON"].between(min_lon, max_lon) & df["LAT"].between(min_lat, max_lat)).to_numpy()
+    return mask
+
+
+class PandasQueries:
+    """Aggregations over a crime_store snapshot: one DataFrame or its chunks."""
+
+    def __init__(self, crime_data):
+        self.chunks = (crime_data,) if isinstance(crime_data, pd.DataFrame) else tuple(crime_data)
+        self._subsets = {}
+
+    def _subset(self, where):
+        # Callbacks run several queries with the same filter; mask once per chunk
+        if where not in self._subsets:
+            parts = [chunk[_mask(chunk, where)] for chunk in self.chunks]
+            self._subsets = {where: parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)}
+        return self._subsets[where]
+
+    def count_by(self, column, where, limit=None):
+        """(column, Count) rows, largest first; missing values are not counted."""
+        counts = self._subset(where)[column].value_counts().rename_axis(column).reset_index(name="Count")
+        counts = _sort_counts(counts, column)
+        return counts.head(limit) if limit else counts
+
+    def count_binned(self, column, bins, labels, where):
+        """(column, Count) per [bins[i], bins[i+1]) bin, empty bins included, largest first."""
+        binned = pd.cut(self._subset(where)[column], bins=bins, labels=labels, right=False)
+        counts = binned.value_counts().reindex(labels, fill_value=0).rename_axis(column).reset_index(name="Count")
+        counts[column] = counts[column].astype(object)
+        return _sort_counts(counts, column)
+
+    def rows(self, columns, where, limit=None):
+        subset = self._subset(where)[columns]
+        return (subset.head(limit) if limit else subset).reset_index(drop=True)
+
+
+# ============================
+# 🦆 DuckDB backend
+# ============================
+def _source_sql(source):
+    """A SELECT over the Parquet/CSV source with the column types crime_store gives the frame."""
+    if str(source).endswith(".csv"):
+        casts = ", ".join(f'TRY_CAST(TRY_CAST("{c}" AS DOUBLE) AS {"BIGINT" if c in INTEGER_COLUMNS else "DOUBLE"}) '
+                          f'AS "{c}"' for c in NUMERIC_COLUMNS)
+        relation = (f"(SELECT * REPLACE (TRY_STRPTIME(\"DATE OCC\", '{LAPD_DATE_FORMAT}') AS \"DATE OCC\", "
+                    f"TRY_CAST(DR_NO AS BIGINT) AS DR_NO, {casts}) "
+                    f"FROM read_csv('{source}', header=true, all_varchar=true))")
+    else:
+        relation = f"read_parquet('{source}')"
+    # Same rows crime_store keeps
+    return f'SELECT * FROM {relation} WHERE DR_NO IS NOT NULL AND "DATE OCC" IS NOT NULL AND "AREA NAME" IS NOT NULL'
+
+
+def export_parquet(csv_path, parquet_path):
+    """Convert the incident CSV to typed Parquet with DuckDB (spills to disk; never loads it whole).
+
+    Rows are clustered by area, then date, so the row-group min/max statistics
+    let area and date filters skip most of the file.
+    """
+    con = duckdb.connect()
+    con.execute(f"COPY ({_source_sql(csv_path)} ORDER BY \"AREA NAME\", \"DATE OCC\") "
+                f"TO '{parquet_path}' (FORMAT parquet)")
+    con.close()
+
+
+class DuckDBQueries:
+    """The PandasQueries aggregations as SQL over the `incidents` view."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def _where(self, where):
+        clauses, params = [], []
+        for column, values in (("AREA NAME", where.areas), ("Crm Cd Desc", where.crime_types),
+                               ("Premis Desc", where.premises)):
+            if values is not None:
+                clauses.append(f'"{column}" IN (SELECT UNNEST(?))' if values else "FALSE")
+                params.extend([list(values)] if values else [])
+        if where.start is not None:
+            clauses.append('"DATE OCC" >= ?')
+            params.append(pd.Timestamp(where.start).to_pydatetime())
+        if where.end is not None:
+            clauses.append('"DATE OCC" <= ?')
+            params.append(pd.Timestamp(where.end).to_pydatetime())
+        if where.with_coords or where.bbox is not None:
+            clauses.append("LAT IS NOT NULL AND LON IS NOT NULL AND NOT isnan(LAT) AND NOT isnan(LON)")
+        if where.bbox is not None:
+            clauses.append("LON BETWEEN ? AND ? AND LAT BETWEEN ? AND ?")
+            min_lon, min_lat, max_lon, max_lat = where.bbox
+            params.extend([min_lon, max_lon, min_lat, max_lat])
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count_by(self, column, where, limit=None):
+        sql_where, params = self._where(where)
+        sql_where = (sql_where + " AND " if sql_where else "WHERE ") + f'"{column}" IS NOT NULL'
+        if column in NUMERIC_COLUMNS:
+            sql_where += f' AND NOT isnan(CAST("{column}" AS DOUBLE))'
+        limit_sql = f"LIMIT {int(limit)}" if limit else ""
+        return self.cursor.execute(
+            f'SELECT "{column}", COUNT(*) AS Count FROM incidents {sql_where} '
+            f'GROUP BY "{column}" ORDER BY Count DESC, "{column}" {limit_sql}', params).df()
+
+    def count_binned(self, column, bins, labels, where):
+        sql_where, params = self._where(where)
+        cases = " ".join(f'WHEN "{column}" >= {lo} AND "{column}" < {hi} THEN {i}'
+                         for i, (lo, hi) in enumerate(zip(bins[:-1], bins[1:])))
+        counts = self.cursor.execute(
+            f'SELECT CASE {cases} END AS bin, COUNT(*) AS Count FROM incidents {sql_where} GROUP BY bin',
+            params).df().dropna()
+        per_bin = np.zeros(len(labels), dtype=np.int64)
+        per_bin[counts["bin"].astype(int).to_numpy()] = counts["Count"].to_numpy()
+        return _sort_counts(pd.DataFrame({column: pd.Series(labels, dtype=object), "Count": per_bin}), column)
+
+    def rows(self, columns, where, limit=None):
+        sql_where, params = self._where(where)
+        select = ", ".join(f'"{c}"' for c in columns)
+        limit_sql = f"LIMIT {int(limit)}" if limit else ""
+        return self.cursor.execute(f"SELECT {select} FROM incidents {sql_where} {limit_sql}", params).df()
+
+
+class DuckDBBackend:
+    """One in-process DuckDB database with an `incidents` view over the source file(s).
+
+    Queries scan the files (column-pruned, multi-threaded, spilling to disk
+    when needed), so the incidents never have to fit in memory. Each
+    incident_queries() call gets its own cursor, which makes it thread-safe.
+    """
+
+    def __init__(self, source=DUCKDB_SOURCE):
+        if not HAS_DUCKDB:
+            raise ImportError("CRIME_QUERY_BACKEND=duckdb needs the duckdb package (pip install duckdb)")
+        self.source = source
+        self._con = duckdb.connect()
+        self._con.execute(f"CREATE VIEW incidents AS {_source_sql(source)}")
+
+    def queries(self):
+        return DuckDBQueries(self._con.cursor())
+
+    def close(self):
+        self._con.close()
+
+
+_duckdb_backend = None
+_duckdb_lock = threading.Lock()
+
+
+def incident_queries(backend=None):
+    """Query object for one callback: a fixed crime_store snapshot (pandas) or a DuckDB cursor."""
+    global _duckdb_backend
+    if (backend or BACKEND) == "duckdb":
+        with _duckdb_lock:
+            if _duckdb_backend is None:
+                _duckdb_backend = DuckDBBackend()
+        return _duckdb_backend.queries()
+    from crime_store import crime_store
+    return PandasQueries(crime_store.snapshot().chunks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the incident CSV to Parquet for the DuckDB backend")
+    parser.add_argument("--csv", default="crime_data_cleaned_2020_present.csv")
+    parser.add_argument("--parquet", default=DUCKDB_SOURCE)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    export_parquet(args.csv, args.parquet)
+    print(f"✅ Wrote {args.parquet} in {time.perf_counter() - t0:.1f}s")
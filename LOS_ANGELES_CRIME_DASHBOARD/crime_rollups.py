@@ -0,0 +1,138 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+LAPD_DATE_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+GRANULARITIES = ["Day", "Week", "Month", "Year"]
+# Window (in periods) used when a trend chart asks for a rolling average
+ROLLING_WINDOWS = {"Day": 7, "Week": 4, "Month": 3, "Year": 2}
+
+
+def parse_dates(dates):
+    """DATE OCC as datetimes: the raw LAPD format first, anything else pandas can infer."""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    parsed = pd.to_datetime(dates, format=LAPD_DATE_FORMAT, errors="coerce")
+    if parsed.isna().sum() > dates.isna().sum():
+        parsed = parsed.fillna(pd.to_datetime(dates.where(parsed.isna()), errors="coerce"))
+    return parsed
+
+
+def _period_starts(days, granularity):
+    if granularity == "Day":
+        return days
+    if granularity == "Week":
+        return days - pd.to_timedelta(days.dayofweek, unit="D")
+    if granularity == "Month":
+        return days.to_period("M").to_timestamp()
+    if granularity == "Year":
+        return days.to_period("Y").to_timestamp()
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+class CrimeRollup:
+    """Pre-aggregated incident counts by period × area × crime type.
+
+    Built once from DATE OCC; trend queries then sum a few small arrays
+    instead of grouping raw rows, so their cost does not depend on the number
+    of incidents. extend() folds new incidents into a copy without touching
+    the rows already counted.
+
+    counts, when given, holds how many incidents each row stands for, so the
+    rollup can be built from pre-aggregated (day, area, type) counts, e.g. a
+    GROUP BY in DuckDB, instead of raw rows.
+    """
+
+    def __init__(self, crime_data, counts=None):
+        self.areas = pd.Index([], dtype=object)
+        self.crime_types = pd.Index([], dtype=object)
+        self.start = None
+        self.days = pd.DatetimeIndex([])
+        self.daily = np.zeros((0, 0, 0), dtype=np.int32)
+        self._add(crime_data, counts)
+
+    def _add(self, crime_data, counts=None):
+        dates = parse_dates(crime_data["DATE OCC"])
+        valid = (dates.notna() & crime_data["AREA NAME"].notna() & crime_data["Crm Cd Desc"].notna()).to_numpy()
+        if not valid.any():
+            self._derive_periods()
+            return
+        days = dates[valid].dt.normalize()
+        area_names = crime_data["AREA NAME"][valid]
+        crime_types = crime_data["Crm Cd Desc"][valid]
+        weights = None if counts is None else np.asarray(counts)[valid]
+
+        # New areas/types are appended so existing codes stay valid
+        new_areas = pd.Index(area_names.unique()).difference(self.areas)
+        new_types = pd.Index(crime_types.unique()).difference(self.crime_types)
+        self.areas = self.areas.append(new_areas)
+        self.crime_types = self.crime_types.append(new_types)
+
+        start = days.min() if self.start is None else min(self.start, days.min())
+        end = days.max() if self.start is None else max(self.days[-1], days.max())
+        pad_front = 0 if self.start is None else (self.start - start).days
+        pad_back = (end - start).days + 1 - pad_front - len(self.days)
+        self.daily = np.pad(self.daily, ((pad_front, pad_back), (0, len(new_areas)), (0, len(new_types))))
+        self.start = start
+        self.days = pd.date_range(start, end, freq="D")
+
+        day_codes = (days - start).dt.days.to_numpy()
+        area_codes = self.areas.get_indexer(area_names)
+        type_codes = self.crime_types.get_indexer(crime_types)
+        flat = np.ravel_multi_index((day_codes, area_codes, type_codes), self.daily.shape)
+        # Not in place: a rollup shared by an older snapshot must not change
+        added = np.bincount(flat, weights=weights, minlength=self.daily.size)
+        self.daily = self.daily + added.reshape(self.daily.shape).astype(np.int32)
+        self._derive_periods()
+
+    def _derive_periods(self):
+        self.periods = {}
+        self.counts = {}
+        self.totals = {}
+        for granularity in GRANULARITIES:
+            starts = _period_starts(self.days, granularity)
+            # Days are consecutive, so every period is one contiguous run
+            boundaries = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]]) if len(starts) else []
+            self.periods[granularity] = starts[boundaries]
+            self.counts[granularity] = (np.add.reduceat(self.daily, boundaries, axis=0) if len(starts)
+                                        else self.daily.copy())
+            self.totals[granularity] = self.counts[granularity].sum(axis=2)
+
+    def extend(self, crime_data):
+        """A new rollup with crime_data's incidents added; self is left unchanged.
+
+        Only the new rows are counted (into a copy of the daily cube);
+        the week/month/year arrays are then re-derived from the cube, whose
+        size does not depend on the number of incidents.
+        """
+        extended = copy.copy(self)
+        extended._add(crime_data)
+        return extended
+
+    def trend(self, granularity="Month", areas=None, crime_types=None, rolling=False):
+        """Long-format counts (Period, AREA NAME, Count) for the given areas.
+
+        crime_types=None counts every type. rolling=True adds a "Rolling Avg"
+        column over ROLLING_WINDOWS[granularity] periods.
+        """
+        areas = list(self.areas) if areas is None else [a for a in areas if a in self.areas]
+        area_idx = self.areas.get_indexer(areas)
+        if crime_types is None:
+            counts = self.totals[granularity][:, area_idx]
+        else:
+            type_idx = self.crime_types.get_indexer(crime_types)
+            type_idx = type_idx[type_idx >= 0]
+            counts = self.counts[granularity][:, area_idx][:, :, type_idx].sum(axis=2)
+
+        periods = self.periods[granularity]
+        trend = pd.DataFrame({
+            "Period": np.tile(periods, len(areas)),
+            "AREA NAME": np.repeat(areas, len(periods)),
+            "Count": counts.T.ravel(),
+        })
+        if rolling:
+            window = ROLLING_WINDOWS[granularity]
+            trend["Rolling Avg"] = (trend.groupby("AREA NAME", sort=False)["Count"]
+                                    .transform(lambda c: c.rolling(window, min_periods=1).mean()))
+        return trend
@@ -0,0 +1,330 @@
+import hmac
+import os
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+from flask import jsonify, request
+
+from crime_queries import BACKEND, DUCKDB_SOURCE, DuckDBBackend
+from crime_rollups import CrimeRollup, parse_dates
+
+# ------------------- Configuration -------------------
+DATA_PATH = "./crime_data_cleaned_2020_present.csv"
+DELTA_DIR = os.environ.get("CRIME_DELTA_DIR", "./deltas")
+WATCH_INTERVAL = float(os.environ.get("CRIME_DELTA_POLL_SECONDS", "60"))
+REQUIRED_COLUMNS = ["DR_NO", "DATE OCC", "AREA NAME", "Crm Cd Desc"]
+NUMERIC_COLUMNS = ["LAT", "LON", "Hour", "Vict Age"]
+
+
+def _prepare(frame):
+    """Type the incident columns the tabs rely on; returns (typed rows, rejected count)."""
+    missing = [c for c in REQUIRED_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+    frame = frame.copy()
+    frame["DR_NO"] = pd.to_numeric(frame["DR_NO"], errors="coerce")
+    frame["DATE OCC"] = parse_dates(frame["DATE OCC"])
+    for col in NUMERIC_COLUMNS:
+        if col in frame.columns:
+            frame[col] = pd.to_numeric(frame[col], errors="coerce")
+    valid = frame["DR_NO"].notna() & frame["DATE OCC"].notna() & frame["AREA NAME"].notna()
+    frame = frame[valid]
+    frame["DR_NO"] = frame["DR_NO"].astype(np.int64)
+    return frame, int((~valid).sum())
+
+
+def _known(dr_numbers, ids):
+    """Which of ids are in any of the sorted DR_NO arrays (a binary search each, no merge)."""
+    known = np.zeros(len(ids), dtype=bool)
+    for sorted_ids in dr_numbers:
+        if len(sorted_ids):
+            pos = np.searchsorted(sorted_ids, ids).clip(max=len(sorted_ids) - 1)
+            known |= sorted_ids[pos] == ids
+    return known
+
+
+def _with_values(options, values):
+    """options (a sorted tuple) plus any new values; the same tuple when nothing is new."""
+    new = set(values.dropna().unique()).difference(options)
+    return tuple(sorted(options + tuple(new))) if new else options
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One consistent, read-only version of the incident data and everything derived from it.
+
+    The rows are kept as chunks: the base table, then the rows of later
+    deltas. Ingesting a delta appends a chunk instead of copying the table.
+    With the DuckDB backend there are no chunks: the rows stay in its source file.
+    """
+    version: int
+    rows: int
+    chunks: tuple  # of DataFrames with the base table's columns
+    rollup: CrimeRollup
+    dr_numbers: tuple  # sorted DR_NO array per chunk, for de-duplicating deltas
+    areas: tuple
+    first_areas: tuple  # the base file's first two areas, the compare tab's default
+    crime_types: tuple
+    premises: tuple
+    date_range: tuple  # first and last DATE OCC
+
+    @cached_property
+    def crime_data(self):
+        """Every chunk as one frame. Copies the table once deltas exist: callbacks query the chunks."""
+        return self.chunks[0] if len(self.chunks) == 1 else pd.concat(self.chunks, ignore_index=True)
+
+
+def _append_chunk(chunks, dr_numbers, rows):
+    """chunks and dr_numbers with rows appended as a new chunk.
+
+    Delta chunks are merged while the one before is no larger than the
+    last, so there are O(log deltas) of them and each row is copied
+    O(log deltas) times. The base table is never copied.
+    """
+    chunks = list(chunks) + [rows.reset_index(drop=True)]
+    dr_numbers = list(dr_numbers) + [np.sort(rows["DR_NO"].to_numpy())]
+    while len(chunks) > 2 and len(chunks[-2]) <= len(chunks[-1]):
+        last, last_ids = chunks.pop(), dr_numbers.pop()
+        chunks[-1] = pd.concat([chunks[-1], last], ignore_index=True)
+        dr_numbers[-1] = np.sort(np.concatenate([dr_numbers[-1], last_ids]))
+    return tuple(chunks), tuple(dr_numbers)
+
+
+class CrimeDataStore:
+    """Versioned in-memory incident table with append-only delta ingestion.
+
+    Callbacks take `crime_store.snapshot()` once and read only from it, so a
+    request that is in flight while a delta lands keeps seeing the version it
+    started with. Ingestion builds the next snapshot off to the side and
+    publishes it with a single reference swap.
+    """
+
+    def __init__(self, path=DATA_PATH, delta_dir=DELTA_DIR):
+        self.delta_dir = delta_dir
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._seen_files = {}
+        self._watcher = None
+        # Under gunicorn, the master's pid: workers leave ingestion to it (see reload_pid)
+        self.reload_pid = None
+        self._snapshot = self._load(path)
+
+    def _load(self, path):
+        crime_data, _ = _prepare(pd.read_csv(path))
+        return Snapshot(
+            version=1,
+            rows=len(crime_data),
+            chunks=(crime_data.reset_index(drop=True),),
+            rollup=CrimeRollup(crime_data),
+            dr_numbers=(np.unique(crime_data["DR_NO"].to_numpy()),),
+            areas=tuple(sorted(crime_data["AREA NAME"].dropna().unique())),
+            first_areas=tuple(crime_data["AREA NAME"].dropna().unique()[:2]),
+            crime_types=tuple(sorted(crime_data["Crm Cd Desc"].dropna().unique())),
+            premises=tuple(sorted(crime_data["Premis Desc"].dropna().unique())) if "Premis Desc" in crime_data else (),
+            date_range=(crime_data["DATE OCC"].min(), crime_data["DATE OCC"].max()),
+        )
+
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def ingest(self, delta):
+        """Append new incidents from a delta CSV path or DataFrame.
+
+        Rows are typed like the base table; rows without DR_NO, DATE OCC or
+        AREA NAME are rejected and DR_NOs already loaded are skipped. The new
+        rows become a chunk of their own; the rollup, option lists and date
+        range are extended with the new rows only.
+        """
+        frame = pd.read_csv(delta) if isinstance(delta, (str, os.PathLike)) else delta
+        rows, rejected = _prepare(frame)
+
+        with self._lock:
+            current = self._snapshot
+            ids = rows["DR_NO"].to_numpy()
+            known = _known(current.dr_numbers, ids)
+            # Also de-duplicate within the delta itself
+            new_rows = rows[~known & ~pd.Series(ids).duplicated().to_numpy()]
+            result = {"added": len(new_rows), "duplicates": int(len(rows) - len(new_rows)),
+                      "rejected": rejected, "version": current.version}
+            if new_rows.empty:
+                return result
+
+            new_rows = new_rows.reindex(columns=current.chunks[0].columns)
+            chunks, dr_numbers = _append_chunk(current.chunks, current.dr_numbers, new_rows)
+            first, last = current.date_range
+            self._snapshot = Snapshot(
+                version=current.version + 1,
+                rows=current.rows + len(new_rows),
+                chunks=chunks,
+                rollup=current.rollup.extend(new_rows),
+                dr_numbers=dr_numbers,
+                areas=_with_values(current.areas, new_rows["AREA NAME"]),
+                first_areas=current.first_areas,
+                crime_types=_with_values(current.crime_types, new_rows["Crm Cd Desc"]),
+                premises=_with_values(current.premises, new_rows["Premis Desc"])
+                if "Premis Desc" in new_rows else current.premises,
+                date_range=(min(first, new_rows["DATE OCC"].min()), max(last, new_rows["DATE OCC"].max())),
+            )
+            result["version"] = self._snapshot.version
+            return result
+
+    def ingest_pending(self):
+        """Ingest every *.csv in delta_dir that is new or changed since it was last seen."""
+        results = {}
+        if not os.path.isdir(self.delta_dir):
+            return results
+        with self._scan_lock:
+            for entry in sorted(os.scandir(self.delta_dir), key=lambda e: e.name):
+                if not entry.name.endswith(".csv"):
+                    continue
+                stat = entry.stat()
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if self._seen_files.get(entry.name) == signature:
+                    continue
+                # A file still being written is re-read once it changes again;
+                # rows already ingested are skipped by DR_NO
+                try:
+                    results[entry.name] = self.ingest(entry.path)
+                except (ValueError, pd.errors.ParserError) as e:
+                    results[entry.name] = {"error": str(e)}
+                self._seen_files[entry.name] = signature
+        return results
+
+    def start_watcher(self, interval=WATCH_INTERVAL, on_ingest=None):
+        """Poll delta_dir in a daemon thread and ingest new delta files.
+
+        on_ingest() is called after a poll that added rows (gunicorn's master
+        uses it to roll its workers over onto the new snapshot).
+        """
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                results = self.ingest_pending()
+                for name, result in results.items():
+                    print(f"📥 {name}: {result}")
+                if on_ingest is not None and any(r.get("added") for r in results.values()):
+                    on_ingest()
+                time.sleep(interval)
+
+        self._watcher = threading.Thread(target=watch, name="crime-delta-watcher", daemon=True)
+        self._watcher.start()
+
+
+def admin_authorized():
+    """True when the request's X-Admin-Token header matches ADMIN_TOKEN (never when it is unset)."""
+    token = os.environ.get("ADMIN_TOKEN")
+    # compare_digest only takes ASCII str, so compare the UTF-8 bytes
+    return bool(token) and hmac.compare_digest(request.headers.get("X-Admin-Token", "").encode(), token.encode())
+
+
+def register_admin_routes(server, store):
+    """POST /admin/reload ingests pending delta files now.
+
+    Under gunicorn (store.reload_pid set) the worker sends SIGHUP to the
+    master instead: the master ingests and replaces every worker with one
+    forked from the new snapshot, and the request returns 202 right away.
+    Requires the X-Admin-Token header to match the ADMIN_TOKEN environment
+    variable; the endpoint is disabled when ADMIN_TOKEN is unset.
+    """
+    @server.route("/admin/reload", methods=["POST"])
+    def admin_reload():
+        if not admin_authorized():
+            return jsonify({"error": "unauthorized"}), 401
+        if store.reload_pid is not None:
+            os.kill(store.reload_pid, signal.SIGHUP)
+            return jsonify({"reloading": True, "version": store.version}), 202
+        files = store.ingest_pending()
+        snapshot = store.snapshot()
+        return jsonify({"version": snapshot.version, "rows": snapshot.rows, "files": files})
+
+
+class DuckDBCrimeStore(CrimeDataStore):
+    """The snapshot's option lists, date range and rollup from DuckDB queries over the source file.
+
+    Used with CRIME_QUERY_BACKEND=duckdb, where the tabs query the file
+    directly, so the incidents are never loaded into pandas. Deltas reach
+    DuckDB by being written to the source file: ingest_pending() (and so the
+    watcher and /admin/reload) re-derives the snapshot when the file changes.
+    """
+
+    def __init__(self, source=DUCKDB_SOURCE, delta_dir=DELTA_DIR):
+        self.source = source
+        self._source_signature = _signature(source)
+        super().__init__(source, delta_dir)
+
+    def _load(self, source, version=1):
+        # Under gunicorn this runs in the master, which must not fork with a
+        # DuckDB connection open: use one for this load only
+        backend = DuckDBBackend(source)
+        try:
+            cursor = backend.queries().cursor
+
+            def distinct(column):
+                values = cursor.execute(f'SELECT DISTINCT "{column}" FROM incidents WHERE "{column}" IS NOT NULL')
+                return tuple(sorted(row[0] for row in values.fetchall()))
+
+            # A plain scan keeps file order (preserve_insertion_order), so LIMIT 1 is the first match;
+            # export_parquet sorts by area, so for Parquet these are the first two alphabetically
+            first_area = cursor.execute(
+                'SELECT "AREA NAME" FROM incidents WHERE "AREA NAME" IS NOT NULL LIMIT 1').fetchone()
+            second_area = first_area and cursor.execute(
+                'SELECT "AREA NAME" FROM incidents WHERE "AREA NAME" IS NOT NULL AND "AREA NAME" <> ? LIMIT 1',
+                first_area).fetchone()
+
+            rows, first, last = cursor.execute('SELECT COUNT(*), MIN("DATE OCC"), MAX("DATE OCC") FROM incidents').fetchone()
+            daily = cursor.execute(
+                'SELECT date_trunc(\'day\', "DATE OCC") AS "DATE OCC", "AREA NAME", "Crm Cd Desc", COUNT(*) AS Count '
+                'FROM incidents WHERE "Crm Cd Desc" IS NOT NULL GROUP BY ALL').df()
+            return Snapshot(
+                version=version,
+                rows=rows,
+                chunks=(),
+                rollup=CrimeRollup(daily, counts=daily["Count"].to_numpy()),
+                dr_numbers=(),
+                areas=distinct("AREA NAME"),
+                first_areas=tuple(row[0] for row in (first_area, second_area) if row),
+                crime_types=distinct("Crm Cd Desc"),
+                premises=distinct("Premis Desc"),
+                date_range=(pd.Timestamp(first), pd.Timestamp(last)),
+            )
+        finally:
+            backend.close()
+
+    def ingest(self, delta):
+        raise ValueError(f"the DuckDB backend reads {self.source}: append new incidents to that file")
+
+    def ingest_pending(self):
+        """Re-derive the snapshot if the source file has changed since it was last read."""
+        import duckdb
+        name = os.path.basename(self.source)
+        with self._scan_lock:
+            try:
+                signature = _signature(self.source)
+                if signature == self._source_signature:
+                    return {}
+                current = self._snapshot
+                # A file still being rewritten fails to load and is retried on the next call
+                self._snapshot = self._load(self.source, version=current.version + 1)
+            except (OSError, duckdb.Error) as e:
+                return {name: {"error": str(e)}}
+            self._source_signature = signature
+            return {name: {"added": self._snapshot.rows - current.rows, "version": self._snapshot.version}}
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+crime_store = DuckDBCrimeStore() if BACKEND == "duckdb" else CrimeDataStore()
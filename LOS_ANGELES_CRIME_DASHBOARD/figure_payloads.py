@@ -0,0 +1,44 @@
+import numpy as np
+import plotly.graph_objects as go
+from dash import Patch, ctx
+from dash.exceptions import MissingCallbackContextException
+
+# Top-level layout properties plotly express sets on this app's figures. A patch
+# re-sends these (null when the new figure lacks one, so a stale value is
+# cleared) and never the template, which is most of a small figure's JSON.
+PX_LAYOUT_KEYS = ("title", "xaxis", "yaxis", "legend", "barmode", "coloraxis", "margin", "mapbox", "height", "font")
+
+
+def figure_update(fig):
+    """`fig` itself on a graph's first render, afterwards a Patch of its traces and input-dependent layout.
+
+    Plotly's to_dict() sends numeric numpy arrays as base64 typed arrays, so
+    traces built from numpy (not lists) go out in binary form either way.
+    Called outside a callback (benchmarks, scripts) it returns `fig`.
+    """
+    try:
+        if ctx.triggered_id is None:
+            return fig
+    except MissingCallbackContextException:
+        return fig
+    figure = fig.to_dict()
+    patch = Patch()
+    patch["data"] = figure["data"]
+    for key in set(PX_LAYOUT_KEYS).union(figure["layout"]).difference({"template"}):
+        patch["layout"][key] = figure["layout"].get(key)
+    return patch
+
+
+def compact_trace(trace):
+    """A trace as a dict with numeric arrays in typed form, for assigning into a Patch."""
+    return go.Figure(trace).to_dict()["data"][0]
+
+
+def compact_dates(dates):
+    """Day-resolution dates as "YYYY-MM-DD" strings (pandas would send 29-character ISO timestamps)."""
+    return dates.dt.strftime("%Y-%m-%d")
+
+
+def float32(values):
+    """Coordinates as float32: half the bytes of float64 and still ~1 m precision for LAT/LON."""
+    return np.asarray(values, dtype=np.float32)
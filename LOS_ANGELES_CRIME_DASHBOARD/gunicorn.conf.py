@@ -0,0 +1,71 @@
+# ============================
+# 🚀 Production serving (gunicorn)
+# ============================
+# gunicorn -c gunicorn.conf.py wsgi:server
+#
+# preload_app imports wsgi.py (CSV data, rollups, SentenceTransformer,
+# regressor, case index) once in the master; forked workers share those pages
+# copy-on-write instead of each loading their own copy.
+#
+# Delta ingestion happens in the master too. After a delta lands, SIGHUP
+# replaces the workers with new ones forked from the updated master, so every
+# worker serves the same snapshot and the data stays shared.
+#
+# Set PROMETHEUS_MULTIPROC_DIR so GET /metrics on any worker serves the totals
+# of every worker (metrics.py); the directory is emptied when gunicorn starts.
+import gc
+import os
+import signal
+import sys
+
+bind = os.environ.get("BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+threads = int(os.environ.get("GUNICORN_THREADS", "1"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+preload_app = True
+
+
+def on_starting(server):
+    import metrics
+    if metrics.MULTIPROC_DIR:
+        metrics.clear_multiproc_dir()
+
+
+def _freeze():
+    # Move everything loaded so far out of the GC's generations: a collection
+    # in a worker would otherwise write to (and so un-share) every object header.
+    gc.collect()
+    gc.freeze()
+
+
+def when_ready(server):
+    _freeze()
+    from crime_store import crime_store
+    crime_store.start_watcher(on_ingest=lambda: os.kill(server.pid, signal.SIGHUP))
+
+
+def on_reload(server):
+    # SIGHUP from the watcher or from POST /admin/reload in a worker. With
+    # preload_app the app is not re-imported: ingest any pending deltas here,
+    # then gunicorn forks the new workers from this state.
+    from crime_store import crime_store
+    for name, result in crime_store.ingest_pending().items():
+        print(f"📥 {name}: {result}")
+    _freeze()
+
+
+def post_fork(server, worker):
+    # Workers never ingest themselves; /admin/reload asks the master instead
+    from crime_store import crime_store
+    crime_store.reload_pid = server.pid
+
+    # One torch intra-op pool per worker instead of one per core per worker
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(int(os.environ.get("TORCH_NUM_THREADS", "1")))
+
+
+def worker_exit(server, worker):
+    # Keep the counts recorded since the last periodic flush
+    import metrics
+    if metrics.MULTIPROC_DIR:
+        metrics.flush_metrics()
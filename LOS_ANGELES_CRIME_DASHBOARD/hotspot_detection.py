@@ -1,48 +1,53 @@
 import pandas as pd
-from dash import dcc, html, Input, Output
+from dash import dcc, html, Input, Output, State, Patch, no_update
 import plotly.express as px
+import plotly.graph_objects as go
 
 import dash
 from dash import dcc, html
 import os
+from dataclasses import replace
+from crime_queries import IncidentFilter, incident_queries
+from crime_store import crime_store
+from metrics import StageClock
+from figure_payloads import compact_trace, figure_update, float32
 
-# Load data
-crime_data = pd.read_csv(
-    "./crime_data_cleaned_2020_present.csv",
-    parse_dates=["DATE OCC"]
-)
-
-# Clean LAT/LON columns
-crime_data['LAT'] = pd.to_numeric(crime_data['LAT'], errors='coerce')
-crime_data['LON'] = pd.to_numeric(crime_data['LON'], errors='coerce')
-crime_data.dropna(subset=['LAT', 'LON'], inplace=True)
+# DATE OCC is parsed and LAT/LON are made numeric by the shared crime_store
 
 # Default crime type
 default_crime_type = "ATTEMPTED ROBBERY"
 
+# Per-incident hover details are only sent once the map is zoomed in this far,
+# and only for the incidents in view
+HOVER_ZOOM = 13
+HOVER_MAX_POINTS = 2_000
+HOVER_COLUMNS = ['Crm Cd Desc', 'Premis Desc', 'DATE OCC']
+
 def get_layout():
+    snapshot = crime_store.snapshot()
+    first, last = snapshot.date_range
     return html.Div([
         html.H2("LA Crime Hotspot Heatmap", style={'textAlign': 'center', 'color': '#2c3e50'}),
 
         html.Div([
             dcc.DatePickerRange(
                 id='date-picker',
-                min_date_allowed=crime_data["DATE OCC"].min(),
-                max_date_allowed=crime_data["DATE OCC"].max(),
-                start_date=crime_data["DATE OCC"].min(),
-                end_date=crime_data["DATE OCC"].max(),
+                min_date_allowed=first,
+                max_date_allowed=last,
+                start_date=first,
+                end_date=last,
                 display_format='YYYY-MM-DD'
             ),
             dcc.Dropdown(
                 id='crime-type-dropdown',
-                options=[{'label': c, 'value': c} for c in sorted(crime_data["Crm Cd Desc"].unique())],
+                options=[{'label': c, 'value': c} for c in snapshot.crime_types],
                 value=[default_crime_type],
                 placeholder="Select Crime Type",
                 multi=True
             ),
             dcc.Dropdown(
                 id='premis-dropdown',
-                options=[{'label': p, 'value': p} for p in sorted(crime_data["Premis Desc"].unique())],
+                options=[{'label': p, 'value': p} for p in snapshot.premises],
                 placeholder="Select Crime Location Type",
                 multi=True
             ),
@@ -62,6 +67,29 @@ def get_layout():
         ], style={'width': '100%', 'padding': '20px'})
     ])
 
+def hotspot_filter(start_date, end_date, selected_crimes, selected_premises):
+    """The incidents the heatmap shows: mapped, in the date range and of the selected types and premises."""
+    return IncidentFilter(
+        start=pd.Timestamp(start_date) if start_date else None,
+        end=pd.Timestamp(end_date) if end_date else None,
+        crime_types=tuple(selected_crimes) if selected_crimes else (default_crime_type,),
+        premises=tuple(selected_premises) if selected_premises else None,
+        with_coords=True,
+    )
+
+def hover_points(queries, where, relayout):
+    """(lat, lon, customdata) of the incidents in view when zoomed in past HOVER_ZOOM, else empty."""
+    relayout = relayout or {}
+    corners = relayout.get('mapbox._derived', {}).get('coordinates')
+    if relayout.get('mapbox.zoom', 0) < HOVER_ZOOM or not corners:
+        return [], [], []
+    lons, lats = zip(*corners)
+    in_view = queries.rows(['LAT', 'LON'] + HOVER_COLUMNS,
+                           replace(where, bbox=(min(lons), min(lats), max(lons), max(lats))),
+                           limit=HOVER_MAX_POINTS)
+    customdata = in_view[HOVER_COLUMNS].assign(**{'DATE OCC': in_view['DATE OCC'].dt.strftime('%Y-%m-%d')})
+    return float32(in_view["LAT"]), float32(in_view["LON"]), customdata.to_numpy()
+
 def register_callbacks_hotspots(app):
     @app.callback(
         [Output('crime-heatmap', 'figure'),
@@ -69,50 +97,44 @@ def register_callbacks_hotspots(app):
         [Input('date-picker', 'start_date'),
          Input('date-picker', 'end_date'),
          Input('crime-type-dropdown', 'value'),
-         Input('premis-dropdown', 'value')]
+         Input('premis-dropdown', 'value')],
+        [State('crime-heatmap', 'relayoutData')]
     )
-    def update_charts(start_date, end_date, selected_crimes, selected_premises):
-        filtered_df = crime_data[
-            (crime_data["DATE OCC"] >= start_date) &
-            (crime_data["DATE OCC"] <= end_date)
-        ]
-
-        if selected_crimes:
-            filtered_df = filtered_df[filtered_df["Crm Cd Desc"].isin(selected_crimes)]
-        else:
-            filtered_df = filtered_df[filtered_df["Crm Cd Desc"] == default_crime_type]
+    def update_charts(start_date, end_date, selected_crimes, selected_premises, relayout):
+        clock = StageClock()
+        queries = incident_queries()
+        where = hotspot_filter(start_date, end_date, selected_crimes, selected_premises)
+        coords = queries.rows(['LAT', 'LON'], where)
+        top_n_df = queries.count_by('AREA NAME', where, limit=10)
+        top_n_df.columns = ['AREA NAME', 'Crime Count']
+        lat, lon, customdata = hover_points(queries, where, relayout)
+        clock.lap("filter")
 
-        if selected_premises:
-            filtered_df = filtered_df[filtered_df["Premis Desc"].isin(selected_premises)]
-
-        # Heatmap
+        # Heatmap: coordinates only (float32, sent as typed arrays); hover
+        # details come from the overlay trace below once zoomed in
         heatmap_fig = px.density_mapbox(
-            filtered_df,
-            lat="LAT",
-            lon="LON",
+            lat=float32(coords["LAT"]),
+            lon=float32(coords["LON"]),
             radius=10,
             center=dict(lat=34.0522, lon=-118.2437),
             zoom=9.5,
-            hover_data={
-                'Crm Cd Desc': True,
-                'Premis Desc': True,
-                'DATE OCC': True,
-                'LAT': False,
-                'LON': False
-            },
             mapbox_style="carto-darkmatter",
             color_continuous_scale="YlOrRd",
             title="Crime Density Heatmap"
         )
+        heatmap_fig.update_traces(hoverinfo='skip', hovertemplate=None)
+        heatmap_fig.add_trace(go.Scattermapbox(
+            lat=lat, lon=lon, customdata=customdata, mode='markers',
+            marker={'size': 12, 'opacity': 0}, showlegend=False,
+            hovertemplate='%{customdata[0]}<br>%{customdata[1]}<br>%{customdata[2]}<extra></extra>'
+        ))
         heatmap_fig.update_layout(
             margin={"r": 0, "t": 50, "l": 0, "b": 0},
-            font=dict(family="Arial", size=13, color="#ffffff")
+            font=dict(family="Arial", size=13, color="#ffffff"),
+            uirevision='hotspots'  # keep the user's zoom when the filters change
         )
 
         # Bar chart
-        top_n_df = filtered_df.groupby('AREA NAME').size().reset_index(name='Crime Count')
-        top_n_df = top_n_df.sort_values(by='Crime Count', ascending=False).head(10)
-
         bar_chart_fig = px.bar(
             top_n_df,
             x='AREA NAME',
@@ -129,8 +151,30 @@ def register_callbacks_hotspots(app):
             margin={"r": 0, "t": 50, "l": 0, "b": 40},
             font=dict(family="Arial", size=13, color="#ffffff")
         )
+        clock.lap("figures")
 
-        return heatmap_fig, bar_chart_fig
+        return figure_update(heatmap_fig), figure_update(bar_chart_fig)
+
+    @app.callback(
+        Output('crime-heatmap', 'figure', allow_duplicate=True),
+        [Input('crime-heatmap', 'relayoutData')],
+        [State('date-picker', 'start_date'),
+         State('date-picker', 'end_date'),
+         State('crime-type-dropdown', 'value'),
+         State('premis-dropdown', 'value')],
+        prevent_initial_call=True
+    )
+    def update_heatmap_hover(relayout, start_date, end_date, selected_crimes, selected_premises):
+        # Pan/zoom only swaps the overlay's points
+        if not relayout or 'mapbox.zoom' not in relayout:
+            return no_update
+        where = hotspot_filter(start_date, end_date, selected_crimes, selected_premises)
+        lat, lon, customdata = hover_points(incident_queries(), where, relayout)
+        points = compact_trace(go.Scattermapbox(lat=lat, lon=lon, customdata=customdata))
+        patch = Patch()
+        for key in ('lat', 'lon', 'customdata'):
+            patch['data'][1][key] = points.get(key, [])
+        return patch
 
 if __name__ == "__main__":
     app = dash.Dash(__name__, suppress_callback_exceptions=True)
@@ -0,0 +1,51 @@
+from dash import dcc, html, Input, Output, State, no_update
+
+# Tabs whose content is rendered the first time the tab is selected and then
+# stays mounted (hidden while another tab is active). Switching back keeps the
+# tab's dropdowns, figures and stores as the user left them, and its callbacks
+# do not run again.
+RENDERED_STORE = 'rendered-tabs'
+SHOWN = {'display': 'block'}
+HIDDEN = {'display': 'none'}
+
+
+def pane_id(tab):
+    return f'tab-pane-{tab}'
+
+
+def tab_panes(tabs, selected, children):
+    """One container per tab; only `selected` is rendered (with children) and visible."""
+    return [dcc.Store(id=RENDERED_STORE, data=[selected])] + [
+        html.Div(id=pane_id(tab), children=children if tab == selected else None,
+                 style=SHOWN if tab == selected else HIDDEN)
+        for tab in tabs
+    ]
+
+
+def switch_tab(tab, rendered, tabs, render):
+    """(children, styles, rendered) outputs for selecting `tab`.
+
+    Only a tab that has never been shown is rendered; every other pane's
+    children are left as they are (no_update).
+    """
+    first_time = tab not in rendered
+    children = [render(t) if t == tab and first_time else no_update for t in tabs]
+    styles = [SHOWN if t == tab else HIDDEN for t in tabs]
+    return children, styles, (rendered + [tab] if first_time else no_update)
+
+
+def register_tab_callbacks(app, tabs_id, tabs, render):
+    tabs = list(tabs)
+
+    @app.callback(
+        [Output(pane_id(t), 'children') for t in tabs] + [Output(pane_id(t), 'style') for t in tabs]
+        + [Output(RENDERED_STORE, 'data')],
+        Input(tabs_id, 'value'),
+        State(RENDERED_STORE, 'data'),
+        prevent_initial_call=True
+    )
+    def render_tab(tab, rendered):
+        children, styles, rendered = switch_tab(tab, rendered, tabs, render)
+        return children + styles + [rendered]
+
+    return render_tab
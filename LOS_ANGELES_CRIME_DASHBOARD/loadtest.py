@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+# ------------------- Requests -------------------
+# Dash callback payloads, as sent by the browser when the area tab changes
+AREA_TREND_PAYLOAD = {
+    "output": "area-crime-time-series.figure",
+    "outputs": {"id": "area-crime-time-series", "property": "figure"},
+    "inputs": [
+        {"id": "area-name-dropdown", "property": "value", "value": "Central"},
+        {"id": "area-trend-granularity", "property": "value", "value": "Month"},
+        {"id": "area-trend-rolling", "property": "value", "value": []},
+    ],
+    "changedPropIds": ["area-name-dropdown.value"],
+    "state": [],
+}
+AREA_GRAPHS_PAYLOAD = {
+    "output": "..area-crime-type-bar.figure...hourly-crime-area-bar.figure...victim-sex-pie.figure"
+              "...victim-descent-pie.figure...victim-age-group-bar.figure..",
+    "outputs": [{"id": i, "property": "figure"} for i in
+                ["area-crime-type-bar", "hourly-crime-area-bar", "victim-sex-pie",
+                 "victim-descent-pie", "victim-age-group-bar"]],
+    "inputs": [{"id": "area-name-dropdown", "property": "value", "value": "Central"}],
+    "changedPropIds": ["area-name-dropdown.value"],
+    "state": [],
+}
+# The severity tab's Analyze click: one embedding + regressor pass per request (plus the LLM call)
+SEVERITY_INPUTS = {"vict_age": 32, "vict_sex": "M", "vict_descent": "W", "crime_desc": "Burglary",
+                   "premis": "Residence", "area": "Central", "time_day": "Night", "day": "Sunday", "month": 3,
+                   "year": 2024, "mocodes": "1300 0344", "weapon": "Knife"}
+SEVERITY_PAYLOAD = {
+    "output": "..crime_history_store.data...latest_crime_output.children...similar_cases_output.children..",
+    "outputs": [{"id": "crime_history_store", "property": "data"},
+                {"id": "latest_crime_output", "property": "children"},
+                {"id": "similar_cases_output", "property": "children"}],
+    "inputs": [{"id": "analyze_btn", "property": "n_clicks", "value": 1}],
+    "changedPropIds": ["analyze_btn.n_clicks"],
+    "state": [{"id": k, "property": "value", "value": v} for k, v in SEVERITY_INPUTS.items()]
+             + [{"id": "crime_history_store", "property": "data", "value": []}],
+}
+PAYLOADS = {"area-trend": AREA_TREND_PAYLOAD, "area-graphs": AREA_GRAPHS_PAYLOAD, "severity": SEVERITY_PAYLOAD}
+
+
+def post_callback(base_url, payload):
+    req = urllib.request.Request(base_url + "/_dash-update-component", data=json.dumps(payload).encode(),
+                                 headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(req, timeout=120) as resp:
+        resp.read()
+        return resp.status
+
+
+# ------------------- Memory -------------------
+def children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_kb(pid):
+    """Rss, Pss and Uss (private pages) from /proc/<pid>/smaps_rollup (Linux)."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {"rss": fields.get("Rss", 0), "pss": fields.get("Pss", 0),
+            "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)}
+
+
+# ------------------- Load generation -------------------
+def run_load(base_url, payload, concurrency, duration):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                post_callback(base_url, payload)
+                with lock:
+                    latencies.append(time.perf_counter() - t0)
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for c in clients:
+        c.start()
+    for c in clients:
+        c.join()
+    return latencies, errors
+
+
+def start_server(app, workers, port, timeout):
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}")
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", app], env=env)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {proc.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5).read()
+            if len(children(proc.pid)) >= workers:
+                return proc
+        except OSError:
+            pass
+        time.sleep(1)
+    proc.kill()
+    raise RuntimeError("gunicorn did not become ready")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and per-worker memory vs gunicorn worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--payload", choices=sorted(PAYLOADS), default="area-graphs")
+    parser.add_argument("--app", default="wsgi:server", help="gunicorn app to serve")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--startup-timeout", type=float, default=600)
+    parser.add_argument("--output", help="optional JSON file for the results")
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        proc = start_server(args.app, workers, args.port, args.startup_timeout)
+        try:
+            base_url = f"http://127.0.0.1:{args.port}"
+            post_callback(base_url, PAYLOADS[args.payload])  # warm-up
+            latencies, errors = run_load(base_url, PAYLOADS[args.payload], args.concurrency, args.duration)
+            worker_mem = [memory_kb(pid) for pid in children(proc.pid)]
+            master_mem = memory_kb(proc.pid)
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=60)
+
+        result = {
+            "workers": workers,
+            "requests_per_s": len(latencies) / args.duration,
+            "p50_ms": float(np.percentile(latencies, 50) * 1000) if latencies else None,
+            "p95_ms": float(np.percentile(latencies, 95) * 1000) if latencies else None,
+            "errors": len(errors),
+            "master_rss_mb": master_mem["rss"] / 1024,
+            "worker_rss_mb": float(np.mean([m["rss"] for m in worker_mem]) / 1024),
+            "worker_pss_mb": float(np.mean([m["pss"] for m in worker_mem]) / 1024),
+            "worker_uss_mb": float(np.mean([m["uss"] for m in worker_mem]) / 1024),
+        }
+        results.append(result)
+        print(f"👷 {workers} workers: {result['requests_per_s']:.1f} req/s, p95 {result['p95_ms']:.0f} ms, "
+              f"worker RSS {result['worker_rss_mb']:.0f} MB / PSS {result['worker_pss_mb']:.0f} MB / "
+              f"USS {result['worker_uss_mb']:.0f} MB, errors {result['errors']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
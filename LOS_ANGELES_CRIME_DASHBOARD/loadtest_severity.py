@@ -0,0 +1,222 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import zlib
+
+import joblib
+import numpy as np
+
+import metrics
+from severity_inference import (REGRESSOR_PATH, BatchedSeverityModel, SeverityClient, SeverityModel,
+                                SeverityServer, load_severity_model)
+from synthetic_data import make_incidents, make_profiles
+from text_cleaning import clean_text_bulk
+
+MODES = ["direct", "batched", "socket"]
+# The sidecar writes its metrics here, so model-pass timings are reported for every mode
+SIDECAR_METRICS_DIR = "/tmp/severity_loadtest_metrics"
+SIDECAR_FLUSH_SECONDS = 0.2
+
+
+# ------------------- Inputs -------------------
+class StandInEncoder:
+    """numpy stand-in for the SentenceTransformer where torch is unavailable.
+
+    Costs like a small transformer layer: a token embedding per word, a
+    768→3072→768 feed-forward over the padded batch, then mean pooling. Only
+    use it to compare serving modes, not to judge absolute latency.
+    """
+
+    def __init__(self, dim=768, hidden=3072, vocab=8192, max_tokens=128, seed=0):
+        rng = np.random.default_rng(seed)
+        self.table = (rng.standard_normal((vocab, dim)) * 0.02).astype(np.float32)
+        self.w1 = (rng.standard_normal((dim, hidden)) * 0.02).astype(np.float32)
+        self.w2 = (rng.standard_normal((hidden, dim)) * 0.02).astype(np.float32)
+        self.vocab, self.max_tokens = vocab, max_tokens
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        tokens = [[zlib.crc32(w.encode()) % self.vocab for w in s.split()][:self.max_tokens] or [0]
+                  for s in sentences]
+        ids = np.zeros((len(tokens), max(map(len, tokens))), dtype=np.int64)
+        mask = np.zeros(ids.shape, dtype=np.float32)
+        for i, row in enumerate(tokens):
+            ids[i, :len(row)], mask[i, :len(row)] = row, 1
+        hidden = np.maximum(self.table[ids] @ self.w1, 0) @ self.w2
+        pooled = (hidden * mask[..., None]).sum(axis=1) / mask.sum(axis=1, keepdims=True)
+        return pooled / np.linalg.norm(pooled, axis=1, keepdims=True)
+
+
+def build_model(encoder):
+    if encoder == "stand-in":
+        return SeverityModel(StandInEncoder(), joblib.load(REGRESSOR_PATH))
+    return load_severity_model()
+
+
+def profile_texts(n, seed=0):
+    """n distinct cleaned profiles from synthetic incidents (what the severity tab sends)."""
+    rng = np.random.default_rng(seed)
+    incidents = make_incidents(n, rng, 300_000_000)
+    return list(clean_text_bulk(make_profiles(incidents)["Crime_Profile_Text"]))
+
+
+# ------------------- Load generation -------------------
+def run_load(score, texts, concurrency, duration):
+    """Closed loop: `concurrency` threads each score one profile at a time for `duration` seconds."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        i = offset
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                score(texts[i % len(texts)])
+                with lock:
+                    latencies.append(time.perf_counter() - t0)
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+            i += concurrency
+
+    clients = [threading.Thread(target=client, args=(c,)) for c in range(concurrency)]
+    for c in clients:
+        c.start()
+    for c in clients:
+        c.join()
+    return latencies, errors
+
+
+def format_ms(value):
+    """A latency for the summary line; None when no request in the step succeeded."""
+    return "    n/a" if value is None else f"{value:7.1f} ms"
+
+
+# ------------------- Model-pass timings -------------------
+def pass_totals(state):
+    """(count, sum) of the batch sizes and of the "embedding" and "regressor" stages in a metrics state."""
+    totals = {"batch": [0, 0.0], "embedding": [0, 0.0], "regressor": [0, 0.0]}
+    for labels, counts, total in state.get(metrics.stage_latency.name, []):
+        if labels[1] in totals:
+            totals[labels[1]][0] += sum(counts)
+            totals[labels[1]][1] += total
+    for labels, counts, total in state.get(metrics.severity_batch_size.name, []):
+        totals["batch"][0] += sum(counts)
+        totals["batch"][1] += total
+    return totals
+
+
+def sidecar_state(proc):
+    time.sleep(2 * SIDECAR_FLUSH_SECONDS)
+    try:
+        with open(os.path.join(SIDECAR_METRICS_DIR, f"{proc.pid}.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def pass_timings(before, after):
+    """Model passes between two pass_totals(): count, mean batch size and mean ms per pass of each stage."""
+    passes = after["batch"][0] - before["batch"][0]
+    per_pass = {stage: (after[stage][1] - before[stage][1]) / max(after[stage][0] - before[stage][0], 1) * 1000
+                for stage in ("embedding", "regressor")}
+    return {"passes": passes,
+            "mean_batch": (after["batch"][1] - before["batch"][1]) / passes if passes else None,
+            "embedding_ms_per_pass": per_pass["embedding"], "regressor_ms_per_pass": per_pass["regressor"]}
+
+
+def start_sidecar(socket_path, encoder, max_batch, max_wait_ms, timeout=600):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": SIDECAR_METRICS_DIR,
+           "METRICS_FLUSH_SECONDS": str(SIDECAR_FLUSH_SECONDS)}
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", socket_path,
+                             "--encoder", encoder, "--max-batch", str(max_batch),
+                             "--max-wait-ms", str(max_wait_ms)], env=env)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"sidecar exited with {proc.returncode}")
+        try:
+            SeverityClient(socket_path).score("warm up")
+            return proc
+        except OSError:
+            time.sleep(0.5)
+    proc.kill()
+    raise RuntimeError("sidecar did not become ready")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Severity inference throughput: per-request vs micro-batched")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument("--encoder", choices=["sentence-transformers", "stand-in"], default="sentence-transformers")
+    parser.add_argument("--socket", default="/tmp/severity_loadtest.sock")
+    parser.add_argument("--profiles", type=int, default=2_000, help="distinct profiles cycled through")
+    parser.add_argument("--output", help="optional JSON file for the results")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        model = BatchedSeverityModel(build_model(args.encoder), args.max_batch, args.max_wait_ms)
+        if metrics.MULTIPROC_DIR:
+            metrics.start_flusher()
+        with SeverityServer(args.serve, model) as server:
+            server.serve_forever()
+        return
+
+    texts = profile_texts(args.profiles)
+    model = build_model(args.encoder) if {"direct", "batched"} & set(args.modes) else None
+    results = []
+    for mode in args.modes:
+        sidecar = None
+        if mode == "direct":
+            score = model.score
+        elif mode == "batched":
+            score = BatchedSeverityModel(model, args.max_batch, args.max_wait_ms).score
+        else:
+            sidecar = start_sidecar(args.socket, args.encoder, args.max_batch, args.max_wait_ms)
+            score = SeverityClient(args.socket).score
+        # Model passes run in this process, or in the sidecar (read from its metrics file)
+        state = (lambda: sidecar_state(sidecar)) if sidecar is not None else metrics.registry_state
+        try:
+            score(texts[0])  # warm-up
+            for concurrency in args.concurrency:
+                before = pass_totals(state())
+                latencies, errors = run_load(score, texts, concurrency, args.duration)
+                timings = pass_timings(before, pass_totals(state()))
+                result = {
+                    "mode": mode,
+                    "concurrency": concurrency,
+                    "requests_per_s": len(latencies) / args.duration,
+                    "p50_ms": float(np.percentile(latencies, 50) * 1000) if latencies else None,
+                    "p95_ms": float(np.percentile(latencies, 95) * 1000) if latencies else None,
+                    "errors": len(errors),
+                    **timings,
+                }
+                results.append(result)
+                print(f"⚡ {mode:<8} × {concurrency:>3} clients: {result['requests_per_s']:7.1f} req/s, "
+                      f"p50 {format_ms(result['p50_ms'])}, p95 {format_ms(result['p95_ms'])}, "
+                      f"errors {result['errors']}")
+                if timings["passes"]:
+                    print(f"   {timings['passes']} model passes, mean batch {timings['mean_batch']:.1f}: "
+                          f"embedding {timings['embedding_ms_per_pass']:.1f} ms, "
+                          f"regressor {timings['regressor_ms_per_pass']:.1f} ms per pass")
+        finally:
+            if sidecar is not None:
+                sidecar.terminate()
+                sidecar.wait(timeout=60)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"encoder": args.encoder, "max_batch": args.max_batch, "max_wait_ms": args.max_wait_ms,
+                       "cpu_count": os.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
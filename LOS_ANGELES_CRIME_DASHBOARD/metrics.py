@@ -0,0 +1,361 @@
+import collections
+import contextvars
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; callbacks range from a few ms (rollup trends) to minutes (LLM summaries)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+DASH_UPDATE_PATH = "/_dash-update-component"
+# Set under gunicorn: every process writes its metrics there and /metrics serves
+# the sum over all of them (see Multiprocess mode below)
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "1"))
+
+# Name of the Dash callback being served, so stage timers can label by callback
+_current_callback = contextvars.ContextVar("current_callback", default="none")
+
+
+# ============================
+# 📈 Metric types
+# ============================
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return "+Inf" if value == math.inf else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self._values = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def empty(self):
+        return Counter(self.name, self.documentation, self.labelnames)
+
+    def state(self):
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+    def merge(self, state):
+        with self._lock:
+            for labels, value in state:
+                self._values[tuple(labels)] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._counts = {}
+        self._sums = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            counts = self._counts.setdefault(labels, [0] * len(self.buckets))
+            counts[index] += 1
+            self._sums[labels] += value
+
+    def empty(self):
+        return Histogram(self.name, self.documentation, self.labelnames, self.buckets[:-1])
+
+    def state(self):
+        with self._lock:
+            return [[list(labels), counts, self._sums[labels]] for labels, counts in self._counts.items()]
+
+    def merge(self, state):
+        with self._lock:
+            for labels, counts, total in state:
+                labels = tuple(labels)
+                merged = self._counts.setdefault(labels, [0] * len(self.buckets))
+                merged[:] = [a + b for a, b in zip(merged, counts)]
+                self._sums[labels] += total
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, counts in sorted(self._counts.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    le = _format_labels(self.labelnames, labels, [("le", _format_value(bound))])
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                label_str = _format_labels(self.labelnames, labels)
+                lines.append(f"{self.name}_sum{label_str} {_format_value(self._sums[labels])}")
+                lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+callback_calls = Counter("dash_callback_calls_total", "Dash callback requests by HTTP status.",
+                         ["callback", "status"])
+callback_latency = Histogram("dash_callback_latency_seconds", "Dash callback request latency.", ["callback"])
+callback_bytes = Histogram("dash_callback_response_bytes", "Dash callback response payload size.",
+                           ["callback"], BYTES_BUCKETS)
+callback_exceptions = Counter("dash_callback_exceptions_total", "Exceptions raised by Dash callbacks.",
+                              ["callback", "exception"])
+stage_latency = Histogram("dash_stage_seconds", "Time spent in a stage of a callback.", ["callback", "stage"])
+llm_errors = Counter("llm_errors_total", "Failed LLM calls (the callback falls back).", ["source", "exception"])
+severity_batch_size = Histogram("severity_inference_batch_size", "Profiles per severity model pass.",
+                                buckets=BATCH_BUCKETS)
+REGISTRY = [callback_calls, callback_latency, callback_bytes, callback_exceptions, stage_latency, llm_errors,
+            severity_batch_size]
+
+
+# ============================
+# 🗂️ Multiprocess mode
+# ============================
+# Each process keeps its own registry. With PROMETHEUS_MULTIPROC_DIR set, a
+# process writes it to <dir>/<pid>.json every FLUSH_SECONDS, and /metrics
+# sums every file. Any worker then answers a scrape with the totals of all
+# workers, including workers gunicorn has already rolled over, so counters
+# keep increasing across a reload.
+_flush_lock = threading.Lock()
+_flusher_pid = None
+
+
+def registry_state():
+    """This process's metrics as JSON-able data, in the format of the MULTIPROC_DIR files."""
+    return {metric.name: metric.state() for metric in REGISTRY}
+
+
+def flush_metrics():
+    """Write this process's metrics to its file in MULTIPROC_DIR."""
+    path = os.path.join(MULTIPROC_DIR, f"{os.getpid()}.json")
+    with _flush_lock:
+        with open(path + ".tmp", "w") as f:
+            json.dump(registry_state(), f)
+        os.replace(path + ".tmp", path)
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(FLUSH_SECONDS)
+        flush_metrics()
+
+
+def start_flusher():
+    """Start this process's flush thread (threads do not survive fork, so once per pid)."""
+    global _flusher_pid
+    with _flush_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+    threading.Thread(target=_flush_periodically, name="metrics-flusher", daemon=True).start()
+
+
+def clear_multiproc_dir():
+    """Remove the files of a previous run (call once, before any worker starts)."""
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+    for name in os.listdir(MULTIPROC_DIR):
+        if name.endswith((".json", ".json.tmp")):
+            os.remove(os.path.join(MULTIPROC_DIR, name))
+
+
+def _merged_registry():
+    merged = {metric.name: metric.empty() for metric in REGISTRY}
+    for name in os.listdir(MULTIPROC_DIR):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(MULTIPROC_DIR, name)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for metric_name, values in state.items():
+            if metric_name in merged:
+                merged[metric_name].merge(values)
+    return list(merged.values())
+
+
+def render_metrics():
+    if MULTIPROC_DIR:
+        flush_metrics()
+        metrics = _merged_registry()
+    else:
+        metrics = REGISTRY
+    return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+# ============================
+# ⏱️ Stage timers
+# ============================
+@contextmanager
+def timed_stage(stage):
+    """Record the block's duration as `stage` of the callback being served."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_latency.observe(time.perf_counter() - start, _current_callback.get(), stage)
+
+
+@contextmanager
+def callback_context(name):
+    """Label the stages timed in the block as callback `name`, for work done outside a request thread."""
+    token = _current_callback.set(name)
+    try:
+        yield
+    finally:
+        _current_callback.reset(token)
+
+
+class StageClock:
+    """Times consecutive stages of straight-line code: each lap() records the time since the last."""
+
+    def __init__(self):
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        stage_latency.observe(now - self._last, _current_callback.get(), stage)
+        self._last = now
+
+
+# ============================
+# 🔬 Sampling profiler
+# ============================
+class SamplingProfiler:
+    """Samples every thread's Python stack at a fixed interval into collapsed-stack counts.
+
+    The output ("frame;frame;frame count" lines) feeds flamegraph.pl or speedscope.
+    Sampling costs a little CPU per tick, so it only runs while switched on.
+    """
+
+    def __init__(self):
+        self._stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self.samples = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=0.01):
+        if self.running:
+            return
+        self._stacks.clear()
+        self.samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.collapsed()
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+    def _run(self, interval):
+        own_id = threading.get_ident()
+        while not self._stop.wait(interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{frame.f_code.co_name} ({frame.f_code.co_filename}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+profiler = SamplingProfiler()
+
+
+# ============================
+# 🌐 Flask integration
+# ============================
+def register_metrics(app, authorize):
+    """Instrument Dash callback requests and expose GET /metrics and POST /admin/profiler.
+
+    Metrics are per process unless PROMETHEUS_MULTIPROC_DIR is set, in which
+    case /metrics serves the sum over every process. /admin/profiler takes
+    {"action": "start", "interval": 0.01} (seconds, a positive number) or
+    {"action": "stop"} (which returns the collapsed stacks) and requires
+    authorize() to pass.
+    """
+    from flask import Response, g, jsonify, request
+
+    server = app.server
+
+    def callback_name():
+        body = request.get_json(silent=True) or {}
+        spec = app.callback_map.get(body.get("output"))
+        return getattr(spec["callback"], "__name__", body.get("output")) if spec else "unknown"
+
+    @server.before_request
+    def start_timer():
+        if request.path.endswith(DASH_UPDATE_PATH):
+            g.metrics_callback = callback_name()
+            g.metrics_token = _current_callback.set(g.metrics_callback)
+            g.metrics_start = time.perf_counter()
+
+    @server.after_request
+    def record_request(response):
+        name = g.pop("metrics_callback", None)
+        if name is not None:
+            callback_latency.observe(time.perf_counter() - g.pop("metrics_start"), name)
+            callback_calls.inc(name, str(response.status_code))
+            if not response.direct_passthrough:
+                callback_bytes.observe(len(response.get_data()), name)
+            _current_callback.reset(g.pop("metrics_token"))
+            if MULTIPROC_DIR:
+                start_flusher()
+        return response
+
+    @server.teardown_request
+    def record_exception(exc):
+        if exc is not None and request.path.endswith(DASH_UPDATE_PATH):
+            callback_exceptions.inc(callback_name(), type(exc).__name__)
+
+    @server.route("/metrics")
+    def metrics():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+    @server.route("/admin/profiler", methods=["POST"])
+    def admin_profiler():
+        if not authorize():
+            return jsonify({"error": "unauthorized"}), 401
+        body = request.get_json(silent=True) or {}
+        if body.get("action") == "start":
+            interval = body.get("interval", 0.01)
+            if isinstance(interval, bool) or not isinstance(interval, (int, float)) \
+                    or not math.isfinite(interval) or interval <= 0:
+                return jsonify({"error": "interval must be a positive number of seconds"}), 400
+            profiler.start(interval)
+            return jsonify({"running": True})
+        if body.get("action") == "stop":
+            stacks = profiler.stop()
+            return Response(stacks, mimetype="text/plain", headers={"X-Profiler-Samples": str(profiler.samples)})
+        return jsonify({"error": "action must be 'start' or 'stop'"}), 400
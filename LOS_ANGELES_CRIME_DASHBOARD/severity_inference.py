@@ -0,0 +1,234 @@
+import argparse
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+import metrics
+from metrics import callback_context, severity_batch_size, timed_stage
+
+# ------------------- Configuration -------------------
+# "direct": every request encodes and scores its own profile (batch of 1)
+# "batched": a background thread in each process batches concurrent requests
+# "socket": a `python severity_inference.py` sidecar owns the only copy of the
+#           model and batches requests from every worker
+INFERENCE_MODE = os.environ.get("SEVERITY_INFERENCE", "direct")
+SOCKET_PATH = os.environ.get("SEVERITY_INFERENCE_SOCKET", "/tmp/severity_inference.sock")
+MAX_BATCH_SIZE = int(os.environ.get("SEVERITY_MAX_BATCH", "32"))
+MAX_WAIT_MS = float(os.environ.get("SEVERITY_MAX_WAIT_MS", "5"))
+EMBEDDING_MODEL = "all-mpnet-base-v2"
+REGRESSOR_PATH = "severity_regressor.pkl"
+# Callback label of the stage timings of batched model passes, which serve many callbacks at once
+BATCH_CALLBACK = "severity_batch"
+
+_HEADER = struct.Struct("!I")
+_RESULT = struct.Struct("!BdI")  # status, score, embedding dimension
+
+
+# ============================
+# 🧠 Model
+# ============================
+class SeverityModel:
+    """The embedding model and regressor: scores a batch of cleaned profiles in one pass of each."""
+
+    def __init__(self, encoder, regressor):
+        self.encoder = encoder
+        self.regressor = regressor
+
+    def score_batch(self, texts):
+        """(embeddings of shape (n, dim), model scores of shape (n,)) for n cleaned profiles.
+
+        The encode and predict passes are timed as the "embedding" and
+        "regressor" stages, once per batch.
+        """
+        severity_batch_size.observe(len(texts))
+        with timed_stage("embedding"):
+            embeddings = np.asarray(self.encoder.encode(list(texts), batch_size=len(texts)), dtype=np.float32)
+        with timed_stage("regressor"):
+            scores = self.regressor.predict(embeddings)
+        return embeddings, scores
+
+    def score(self, text):
+        """(embedding of shape (1, dim), model score) for one cleaned profile."""
+        embeddings, scores = self.score_batch([text])
+        return embeddings, float(scores[0])
+
+
+def load_severity_model(model_name=EMBEDDING_MODEL, regressor_path=REGRESSOR_PATH):
+    import joblib
+    from sentence_transformers import SentenceTransformer
+    return SeverityModel(SentenceTransformer(model_name), joblib.load(regressor_path))
+
+
+# ============================
+# 📦 Micro-batching
+# ============================
+class MicroBatcher:
+    """Runs fn over batches of items submitted concurrently from many threads.
+
+    The first item to arrive opens a batch. The batch runs once it holds
+    max_batch_size items or max_wait_ms have passed, whichever comes first.
+    fn takes a list of items and returns one result per item. The worker
+    thread starts on first use in each process, so a batcher created before
+    gunicorn forks still works in the workers.
+    """
+
+    def __init__(self, fn, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+    def submit(self, item):
+        """fn's result for item; blocks until its batch has run and re-raises fn's exception."""
+        future = Future()
+        self._ensure_started().put((item, future))
+        return future.result()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid, self._queue = os.getpid(), queue.SimpleQueue()
+                threading.Thread(target=self._run, args=(self._queue,), name="micro-batcher", daemon=True).start()
+            return self._queue
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            items, futures = zip(*batch)
+            try:
+                results = self.fn(list(items))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+
+class BatchedSeverityModel:
+    """SeverityModel.score() for concurrent callers, run as micro-batches on one thread."""
+
+    def __init__(self, model, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.model = model
+        self._batcher = MicroBatcher(self._score_batch, max_batch_size, max_wait_ms)
+
+    def _score_batch(self, texts):
+        with callback_context(BATCH_CALLBACK):
+            embeddings, scores = self.model.score_batch(texts)
+        return [(embeddings[i:i + 1], float(scores[i])) for i in range(len(texts))]
+
+    def score(self, text):
+        return self._batcher.submit(text)
+
+
+# ============================
+# 🔌 Unix-socket sidecar
+# ============================
+# One request per frame: a 4-byte length, then the cleaned profile as UTF-8.
+# Reply: status 0, score and dimension, then the float32 embedding; or status 1,
+# then a length-prefixed error message.
+def _recv_exact(sock, n):
+    data = bytearray()
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("severity inference socket closed")
+        data.extend(chunk)
+    return bytes(data)
+
+
+class _SeverityRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                (length,) = _HEADER.unpack(_recv_exact(self.request, _HEADER.size))
+                text = _recv_exact(self.request, length).decode()
+            except ConnectionError:
+                return
+            try:
+                embedding, score = self.server.model.score(text)
+                vector = np.ascontiguousarray(embedding[0], dtype=np.float32)
+                reply = _RESULT.pack(0, score, len(vector)) + vector.tobytes()
+            except Exception as e:
+                message = f"{type(e).__name__}: {e}".encode()
+                reply = _RESULT.pack(1, 0.0, 0) + _HEADER.pack(len(message)) + message
+            self.request.sendall(reply)
+
+
+class SeverityServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves a BatchedSeverityModel to every worker: one connection thread each, one model pass per batch."""
+    daemon_threads = True
+
+    def __init__(self, path, model):
+        if os.path.exists(path):
+            os.unlink(path)
+        self.model = model
+        super().__init__(path, _SeverityRequestHandler)
+
+
+class SeverityClient:
+    """SeverityModel.score() answered by the sidecar; one connection per thread (and per forked process)."""
+
+    def __init__(self, path=SOCKET_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.connect(self.path)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def score(self, text):
+        payload = text.encode()
+        conn = self._connection()
+        try:
+            conn.sendall(_HEADER.pack(len(payload)) + payload)
+            status, score, dim = _RESULT.unpack(_recv_exact(conn, _RESULT.size))
+            if status:
+                (length,) = _HEADER.unpack(_recv_exact(conn, _HEADER.size))
+                raise RuntimeError(f"severity inference failed: {_recv_exact(conn, length).decode()}")
+            embedding = np.frombuffer(_recv_exact(conn, 4 * dim), dtype=np.float32).reshape(1, dim)
+        except OSError:
+            # Reconnect on the next call (e.g. after the sidecar restarts)
+            self._local.conn = None
+            conn.close()
+            raise
+        return embedding, score
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve batched severity inference over a Unix socket")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    model = BatchedSeverityModel(load_severity_model(), args.max_batch, args.max_wait_ms)
+    # With the workers' PROMETHEUS_MULTIPROC_DIR, the sidecar's batch sizes and
+    # stage timings show up in their /metrics
+    if metrics.MULTIPROC_DIR:
+        metrics.start_flusher()
+    with SeverityServer(args.socket, model) as server:
+        print(f"✅ Severity inference on {args.socket} (max batch {args.max_batch}, max wait {args.max_wait_ms} ms)")
+        server.serve_forever()
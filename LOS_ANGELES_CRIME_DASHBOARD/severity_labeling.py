@@ -0,0 +1,142 @@
+import argparse
+import json
+import re
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from text_cleaning import HAS_PYARROW, clean_text_bulk
+
+RULES_PATH = "severity_rules.json"
+DEFAULT_CHUNK_SIZE = 250_000
+
+# ============================
+# 🎯 Proxy Labeling
+# ============================
+def generate_proxy_score(text):
+    score = 0
+    if any(w in text for w in ['murder', 'homicide', 'gun', 'dead', 'shoot']):
+        score += 8
+    elif 'assault' in text or 'weapon' in text:
+        score += 6
+    elif 'robbery' in text or 'burglary' in text:
+        score += 5
+    elif 'fraud' in text or 'identity' in text:
+        score += 3
+    elif 'theft' in text:
+        score += 2
+    return min(score, 10)
+
+# ============================
+# ⚙️ Rule-based labeling engine
+# ============================
+def load_rules(path=RULES_PATH):
+    """Ordered keyword→score rules; the first rule with a keyword in the text wins.
+
+    The default severity_rules.json reproduces generate_proxy_score.
+    """
+    with open(path) as f:
+        config = json.load(f)
+    for rule in config["rules"]:
+        if not rule.get("keywords"):
+            raise ValueError(f"Rule {rule.get('name')!r} has no keywords")
+    return config
+
+
+def compile_rules(config):
+    """Compile each rule's keywords into one alternation regex (plain substring semantics)."""
+    return [
+        (rule["name"], rule["keywords"],
+         "|".join(re.escape(k) for k in sorted(rule["keywords"], key=len, reverse=True)), rule["score"])
+        for rule in config["rules"]
+    ]
+
+
+def _contains(s, keywords, pattern):
+    if s.dtype == "string[pyarrow]":
+        return s.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+    # CPython's substring search beats re for a handful of literals
+    return np.fromiter((any(k in text for k in keywords) for text in s), dtype=bool, count=len(s))
+
+
+def _label_chunk(texts, compiled, default_score, max_score, engine):
+    # str() every value as text_cleaning does: astype(str) keeps missing values
+    # missing under pandas 3, and `keyword in <NA>` raises
+    s = texts
+    if not isinstance(s.dtype, pd.StringDtype) or s.hasnans:
+        s = s.astype(object).map(str)
+    s = s.astype("string[pyarrow]") if engine == "pyarrow" else s.astype(object)
+    scores = np.full(len(s), default_score)
+    hits = np.zeros(len(compiled), dtype=np.int64)
+    if not compiled:
+        return pd.Series(np.minimum(scores, max_score), index=texts.index), hits
+
+    # A single pass over every keyword drops rows no rule can match; the
+    # rest cascade through the rules in order, each rule only scanning rows
+    # that no earlier rule claimed (the if/elif ladder, column-wise).
+    all_keywords = [k for _, keywords, _, _ in compiled for k in keywords]
+    remaining = np.flatnonzero(_contains(s, all_keywords, "|".join(p for _, _, p, _ in compiled)))
+    for i, (_, keywords, pattern, score) in enumerate(compiled):
+        if not len(remaining):
+            break
+        matched = _contains(s.iloc[remaining], keywords, pattern)
+        scores[remaining[matched]] = score
+        hits[i] = matched.sum()
+        remaining = remaining[~matched]
+    return pd.Series(np.minimum(scores, max_score), index=texts.index), hits
+
+
+def label_severity(texts, rules=None, engine="auto", n_jobs=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Label a whole column of cleaned profiles with severity scores.
+
+    Returns (scores, hit_counts): scores is a Series aligned with texts and
+    hit_counts the number of rows each rule labelled. Chunks run in parallel
+    via joblib when n_jobs != 1.
+    """
+    config = rules if isinstance(rules, dict) else load_rules(rules or RULES_PATH)
+    compiled = compile_rules(config)
+    if engine == "auto":
+        engine = "pyarrow" if HAS_PYARROW else "python"
+
+    s = texts if isinstance(texts, pd.Series) else pd.Series(texts)
+    chunks = [s.iloc[i:i + chunk_size] for i in range(0, len(s), chunk_size)] or [s]
+    args = (compiled, config.get("default_score", 0), config.get("max_score", np.inf), engine)
+    if n_jobs == 1 or len(chunks) == 1:
+        results = [_label_chunk(chunk, *args) for chunk in chunks]
+    else:
+        results = joblib.Parallel(n_jobs=n_jobs)(joblib.delayed(_label_chunk)(chunk, *args) for chunk in chunks)
+
+    scores = pd.concat([r[0] for r in results]) if len(results) > 1 else results[0][0]
+    hit_counts = pd.DataFrame({
+        "rule": [name for name, _, _, _ in compiled],
+        "score": [score for _, _, _, score in compiled],
+        "hits": np.sum([r[1] for r in results], axis=0).astype(int),
+    })
+    return scores, hit_counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Label crime profiles with the severity rules")
+    parser.add_argument("--data", default="crimeProfileText_data.csv")
+    parser.add_argument("--rules", default=RULES_PATH)
+    parser.add_argument("--n-jobs", type=int, default=1)
+    parser.add_argument("--check", type=int, default=0,
+                        help="verify the first N labels against generate_proxy_score")
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.data, usecols=["Crime_Profile_Text"])["Crime_Profile_Text"].fillna('')
+    t0 = time.perf_counter()
+    cleaned = clean_text_bulk(texts, n_jobs=args.n_jobs)
+    t1 = time.perf_counter()
+    scores, hit_counts = label_severity(cleaned, args.rules, n_jobs=args.n_jobs)
+    t2 = time.perf_counter()
+
+    print(hit_counts.to_string(index=False))
+    print(f"unmatched: {len(scores) - hit_counts['hits'].sum():,}")
+    print(f"🕒 cleaned {len(texts):,} profiles in {t1 - t0:.1f}s, labelled in {t2 - t1:.1f}s")
+    if args.check:
+        sample = cleaned.iloc[:args.check]
+        expected = [generate_proxy_score(text) for text in sample]
+        print(f"✅ matches generate_proxy_score: {scores.iloc[:args.check].tolist() == expected}")
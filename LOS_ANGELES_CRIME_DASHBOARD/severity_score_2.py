@@ -23,8 +23,7 @@ def score_app_layout2():
     return dbc.Container([
         html.H2("🔍 Crime Severity Analyzer", className="text-center my-4"),
 
-        # Store for crime history
-        dcc.Store(id='crime_history_store', data=[]),
+        # crime_history_store lives in the page layout (crime_dash_board.py)
 
         dbc.Row([
             # Left Column - Input Fields
@@ -106,6 +105,9 @@ def score_app_layout2():
             dbc.Col([
                 html.H5("🆕 Latest Crime Analysis", className='mt-3'),
                 html.Div(id='latest_crime_output', style={'whiteSpace': 'pre-line', 'marginBottom': '20px'}),
+
+                html.H5("🗂️ Similar Past Cases", className='mt-3'),
+                html.Div(id='similar_cases_output', style={'whiteSpace': 'pre-line', 'marginBottom': '20px'}),
                 #html.Div(id='latest_crime_output', style={'whiteSpace': 'pre-line', 'marginBottom': '20px'}, dangerously_allow_html=True),
 
 
@@ -119,10 +121,26 @@ def score_app_layout2():
 # -------------------------
 # 🧠 Callbacks
 # -------------------------
-def register_callbacks_severity(app, predict_severity_from_inputs):
+def format_similar_cases(cases):
+    if not cases:
+        return "No similar past cases available."
+
+    result = []
+    for idx, case in enumerate(cases, 1):
+        case_id = case['case_id']
+        profile = df['Crime_Profile_Text'].iloc[case_id] if 0 <= case_id < len(df) else 'N/A'
+        result.append(
+            f"{idx}. Similarity: {case['similarity']:.2f} — Score: {case['severity_score']:g}/10\n"
+            f"    📄 Profile: {profile}"
+        )
+    return "\n".join(result)
+
+
+def register_callbacks_severity(app, predict_severity_from_inputs, find_similar_cases=None):
     @app.callback(
         Output('crime_history_store', 'data'),
         Output('latest_crime_output', 'children'),
+        Output('similar_cases_output', 'children'),
         Input('analyze_btn', 'n_clicks'),
         State('vict_age', 'value'),
         State('vict_sex', 'value'),
@@ -163,7 +181,9 @@ def register_callbacks_severity(app, predict_severity_from_inputs):
         tips_formatted = "\n".join(f"   - {tip}" for tip in tips)
         latest_output = f"🔥 Severity Score: {score}/10\n📝 Crime Profile:\n{profile}\n📢 Awareness Tips:\n{tips_formatted}"
 
-        return history, latest_output
+        similar_cases = find_similar_cases(profile) if find_similar_cases else []
+
+        return history, latest_output, format_similar_cases(similar_cases)
 
     @app.callback(
         Output('crime_history_output', 'children'),
@@ -0,0 +1,306 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+# ------------------- Configuration -------------------
+INDEX_DIR = "case_index"
+EMBEDDINGS_PATH = "severity_artifacts/embeddings.npy"
+SCORES_PATH = "severity_artifacts/labels.npy"
+BLOCK_SIZE = 65_536
+DEFAULT_NPROBE = 16
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+
+VECTORS_FILE = "vectors.npy"
+SCORES_FILE = "scores.npy"
+IDS_FILE = "ids.npy"
+CENTROIDS_FILE = "centroids.npy"
+OFFSETS_FILE = "list_offsets.npy"
+META_FILE = "meta.json"
+
+
+# ------------------- Helpers -------------------
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _save(path, array):
+    # np.save appends ".npy" to bare paths, which would break the .tmp rename
+    with open(path, "wb") as f:
+        np.save(f, array)
+
+
+class _StackedRows:
+    """Read-only row view over a memmapped base followed by in-memory rows."""
+
+    def __init__(self, base, extra):
+        self.base, self.extra = base, extra
+        self.shape = (len(base) + len(extra), base.shape[1])
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        rows = np.arange(len(self))[key] if isinstance(key, slice) else np.asarray(key)
+        out = np.empty((len(rows), self.shape[1]), dtype=np.float32)
+        in_base = rows < len(self.base)
+        out[in_base] = self.base[rows[in_base]]
+        out[~in_base] = self.extra[rows[~in_base] - len(self.base)]
+        return out
+
+
+def _top_k(sims, k):
+    """Indices of the k largest entries per row of sims, best first."""
+    k = min(k, sims.shape[1])
+    part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(sims, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def _merge_top_k(best_sims, best_rows, sims, rows, k):
+    all_sims = np.concatenate([best_sims, sims], axis=1)
+    all_rows = np.concatenate([best_rows, rows], axis=1)
+    keep = _top_k(all_sims, k)
+    return np.take_along_axis(all_sims, keep, axis=1), np.take_along_axis(all_rows, keep, axis=1)
+
+
+def _spherical_kmeans(sample, nlist, iterations=KMEANS_ITERATIONS, seed=42):
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=nlist)
+        sums = np.zeros_like(centroids)
+        filled = counts > 0
+        sums[filled] = np.add.reduceat(sample[order], np.cumsum(counts)[filled] - counts[filled])
+        empty = ~filled
+        sums[empty] = sample[rng.choice(len(sample), empty.sum(), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def _assign_lists(vectors, centroids, block_size=BLOCK_SIZE):
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block_size):
+        block = _normalize(vectors[start:start + block_size])
+        assign[start:start + block_size] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+def _write_index(out_dir, vectors, scores, ids, centroids=None, assign=None, block_size=BLOCK_SIZE):
+    """Write normalized vectors (in IVF list order when centroids are given) + metadata."""
+    os.makedirs(out_dir, exist_ok=True)
+    n, dim = vectors.shape
+    order = np.arange(n) if assign is None else np.argsort(assign, kind="stable")
+
+    tmp = {name: os.path.join(out_dir, name + ".tmp") for name in
+           (VECTORS_FILE, SCORES_FILE, IDS_FILE, CENTROIDS_FILE, OFFSETS_FILE)}
+    out = np.lib.format.open_memmap(tmp[VECTORS_FILE], mode="w+", dtype=np.float32, shape=(n, dim))
+    for start in range(0, n, block_size):
+        rows = order[start:start + block_size]
+        if assign is None:
+            out[start:start + len(rows)] = _normalize(vectors[start:start + len(rows)])
+        else:
+            # Sorted gather keeps memmap reads mostly sequential
+            sorted_rows = np.sort(rows)
+            block = _normalize(vectors[sorted_rows])
+            out[start:start + len(rows)] = block[np.searchsorted(sorted_rows, rows)]
+    out.flush()
+    del out
+    _save(tmp[SCORES_FILE], np.asarray(scores, dtype=np.float32)[order])
+    _save(tmp[IDS_FILE], np.asarray(ids, dtype=np.int64)[order])
+
+    meta = {"dim": dim, "count": n, "mode": "exact" if centroids is None else "ivf"}
+    if centroids is not None:
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(centroids)))])
+        _save(tmp[CENTROIDS_FILE], centroids.astype(np.float32))
+        _save(tmp[OFFSETS_FILE], offsets.astype(np.int64))
+        meta["nlist"] = len(centroids)
+
+    tmp[META_FILE] = os.path.join(out_dir, META_FILE + ".tmp")
+    with open(tmp[META_FILE], "w") as f:
+        json.dump(meta, f, indent=2)
+
+    # Rename into place last (meta.json after the arrays) so readers never see a half-written index
+    for name, path in tmp.items():
+        if os.path.exists(path):
+            os.replace(path, os.path.join(out_dir, name))
+
+
+def build_case_index(embeddings, scores, out_dir=INDEX_DIR, mode="exact", nlist=None, ids=None,
+                     block_size=BLOCK_SIZE):
+    """Build a similar-case index from profile embeddings and their severity scores.
+
+    embeddings may be an (n, dim) array or memmap (e.g. the embeddings.npy
+    written by train_severity_model.py); ids default to row positions in
+    crimeProfileText_data.csv. mode="ivf" clusters the rows into nlist
+    inverted lists (default ~4*sqrt(n)) for approximate search over millions
+    of rows.
+    """
+    n = len(embeddings)
+    ids = np.arange(n) if ids is None else ids
+    if mode == "exact":
+        _write_index(out_dir, embeddings, scores, ids, block_size=block_size)
+    elif mode == "ivf":
+        nlist = nlist or max(1, int(4 * np.sqrt(n)))
+        rng = np.random.default_rng(42)
+        sample_rows = np.sort(rng.choice(n, min(n, nlist * KMEANS_SAMPLE_PER_LIST), replace=False))
+        centroids = _spherical_kmeans(_normalize(embeddings[sample_rows]), min(nlist, len(sample_rows)))
+        assign = _assign_lists(embeddings, centroids, block_size)
+        _write_index(out_dir, embeddings, scores, ids, centroids, assign, block_size)
+    else:
+        raise ValueError(f"Unknown index mode: {mode}")
+    return CaseIndex.load(out_dir)
+
+
+# ------------------- Index -------------------
+class CaseIndex:
+    """Nearest-neighbour search (cosine) over stored crime-profile embeddings.
+
+    Vectors are memory-mapped from disk. Rows added with add() are kept in
+    memory and searched exactly until save() folds them into the files.
+    """
+
+    def __init__(self, path, nprobe=DEFAULT_NPROBE):
+        self.path = path
+        self.nprobe = nprobe
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        self.scores = np.load(os.path.join(path, SCORES_FILE))
+        self.ids = np.load(os.path.join(path, IDS_FILE))
+        self.centroids = self.offsets = None
+        if self.meta["mode"] == "ivf":
+            self.centroids = np.load(os.path.join(path, CENTROIDS_FILE))
+            self.offsets = np.load(os.path.join(path, OFFSETS_FILE))
+        dim = self.meta["dim"]
+        self.pending_vectors = np.empty((0, dim), dtype=np.float32)
+        self.pending_scores = np.empty(0, dtype=np.float32)
+        self.pending_ids = np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def load(cls, path=INDEX_DIR, nprobe=DEFAULT_NPROBE):
+        return cls(path, nprobe)
+
+    def __len__(self):
+        return len(self.vectors) + len(self.pending_vectors)
+
+    def add(self, vectors, scores, ids):
+        """Add new cases (one row or several); they are searchable immediately."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        scores = np.atleast_1d(np.asarray(scores, dtype=np.float32))
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        if vectors.ndim != 2 or vectors.shape[1] != self.meta["dim"]:
+            raise ValueError(f"Expected embeddings of shape (n, {self.meta['dim']}), got {vectors.shape}")
+        if scores.shape != (len(vectors),) or ids.shape != (len(vectors),):
+            raise ValueError(f"Got {len(vectors)} embeddings but scores of shape {scores.shape} "
+                             f"and ids of shape {ids.shape}")
+        self.pending_vectors = np.concatenate([self.pending_vectors, _normalize(vectors)])
+        self.pending_scores = np.concatenate([self.pending_scores, scores])
+        self.pending_ids = np.concatenate([self.pending_ids, ids])
+
+    def save(self, path=None):
+        """Write base + pending rows to path (default: in place) and reload."""
+        path = path or self.path
+        vectors = _StackedRows(self.vectors, self.pending_vectors)
+        scores = np.concatenate([self.scores, self.pending_scores])
+        ids = np.concatenate([self.ids, self.pending_ids])
+        if self.centroids is None:
+            _write_index(path, vectors, scores, ids)
+        else:
+            _write_index(path, vectors, scores, ids, self.centroids, _assign_lists(vectors, self.centroids))
+        self.__init__(path, self.nprobe)
+
+    def _search_rows(self, queries, k, exact):
+        m = len(queries)
+        best_sims = np.full((m, 0), -np.inf, dtype=np.float32)
+        best_rows = np.empty((m, 0), dtype=np.int64)
+        if exact or self.centroids is None:
+            for start in range(0, len(self.vectors), BLOCK_SIZE):
+                sims = queries @ self.vectors[start:start + BLOCK_SIZE].T
+                top = _top_k(sims, k)
+                best_sims, best_rows = _merge_top_k(best_sims, best_rows,
+                                                    np.take_along_axis(sims, top, axis=1), top + start, k)
+            return best_sims, best_rows
+
+        probes = _top_k(queries @ self.centroids.T, self.nprobe)
+        sims_out = np.full((m, k), -np.inf, dtype=np.float32)
+        rows_out = np.full((m, k), -1, dtype=np.int64)
+        for qi, lists in enumerate(probes):
+            rows = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists])
+            if not len(rows):
+                continue
+            # Lists are contiguous on disk, so each probe is one sequential read
+            sims = np.concatenate([self.vectors[self.offsets[l]:self.offsets[l + 1]] @ queries[qi]
+                                   for l in lists])[None, :]
+            top = _top_k(sims, k)[0]
+            sims_out[qi, :len(top)] = sims[0, top]
+            rows_out[qi, :len(top)] = rows[top]
+        return sims_out, rows_out
+
+    def search(self, query, k=5, exact=False):
+        """Top-k most similar cases for one embedding (or a batch of them).
+
+        Returns a list of {"case_id", "similarity", "severity_score"} dicts per
+        query, best first. IVF indexes search nprobe lists unless exact=True.
+        """
+        queries = _normalize(np.atleast_2d(query))
+        sims, rows = self._search_rows(queries, k, exact)
+
+        n_base = len(self.vectors)
+        if len(self.pending_vectors):
+            pending_sims = queries @ self.pending_vectors.T
+            top = _top_k(pending_sims, k)
+            sims, rows = _merge_top_k(sims, rows, np.take_along_axis(pending_sims, top, axis=1), top + n_base, k)
+
+        def lookup(base, pending, r):
+            return base[r] if r < n_base else pending[r - n_base]
+
+        results = [
+            [{"case_id": int(lookup(self.ids, self.pending_ids, r)),
+              "similarity": float(s),
+              "severity_score": float(lookup(self.scores, self.pending_scores, r))}
+             for s, r in zip(q_sims, q_rows) if r >= 0]
+            for q_sims, q_rows in zip(sims, rows)
+        ]
+        return results if np.ndim(query) > 1 else results[0]
+
+
+# ------------------- Build / benchmark -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a similar-case index over profile embeddings")
+    parser.add_argument("--embeddings", default=EMBEDDINGS_PATH)
+    parser.add_argument("--scores", default=SCORES_PATH)
+    parser.add_argument("--out", default=INDEX_DIR)
+    parser.add_argument("--mode", choices=["exact", "ivf"], default="ivf")
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE)
+    parser.add_argument("--queries", type=int, default=100, help="random queries timed after the build")
+    args = parser.parse_args()
+
+    embeddings = np.load(args.embeddings, mmap_mode="r")
+    scores = np.load(args.scores, mmap_mode="r")
+
+    t0 = time.perf_counter()
+    index = build_case_index(embeddings, scores, args.out, args.mode, args.nlist)
+    index.nprobe = args.nprobe
+    print(f"✅ Built {args.mode} index over {len(index):,} cases in {time.perf_counter() - t0:.1f}s")
+
+    rng = np.random.default_rng(0)
+    queries = np.asarray(embeddings[np.sort(rng.choice(len(embeddings), args.queries))])
+    latencies, recall = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        found = index.search(q, k=10)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if args.mode == "ivf":
+            truth = {c["case_id"] for c in index.search(q, k=10, exact=True)}
+            recall.append(len(truth & {c["case_id"] for c in found}) / len(truth))
+    print(f"🕒 search p50 {np.percentile(latencies, 50):.1f} ms, p95 {np.percentile(latencies, 95):.1f} ms"
+          + (f", recall@10 {np.mean(recall):.3f}" if recall else ""))
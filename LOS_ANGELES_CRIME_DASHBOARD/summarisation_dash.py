@@ -5,7 +5,9 @@ from dash import Dash, dcc, html, Input, Output, State
 from tqdm import tqdm
 import time
 from datetime import datetime
+from functools import lru_cache
 from dash.exceptions import PreventUpdate
+from metrics import StageClock, llm_errors, timed_stage
 
 # ------------------- Configuration -------------------
 
@@ -20,16 +22,19 @@ def call_model(prompt, api_key):
     openai.api_key = api_key
     openai.api_base = API_BASE
     try:
-        response = openai.ChatCompletion.create(
-            model=MODEL_ID,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.5,
-        )
+        with timed_stage("llm"):
+            response = openai.ChatCompletion.create(
+                model=MODEL_ID,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.5,
+            )
         return response.choices[0].message.content.strip()
-    except (openai.error.RateLimitError, openai.error.APIConnectionError):
+    except (openai.error.RateLimitError, openai.error.APIConnectionError) as e:
+        llm_errors.inc("summariser", type(e).__name__)
         time.sleep(10)
         return ""
     except Exception as e:
+        llm_errors.inc("summariser", type(e).__name__)
         return f"API Error: {e}"
 
 def summarize_chunks(texts, instruction, api_key):
@@ -46,12 +51,15 @@ def merge_summaries(summaries, final_instruction, api_key):
 
 # ------------------- Dash App -------------------
 
+@lru_cache(maxsize=1)
+def load_area_names():
+    """Area names in the profile CSV, read once (only the AREA NAME column)."""
+    df = pd.read_csv(DATA_PATH, usecols=['AREA NAME'])
+    return tuple(sorted(df['AREA NAME'].dropna().unique()))
+
 def create_layout_summariser():
     """Function to define the layout for the Dash app."""
-    # Read the CSV and populate the dropdown options
-    df = pd.read_csv(DATA_PATH)
-    area_names = sorted(df['AREA NAME'].dropna().unique())
-    dropdown_options = [{'label': name, 'value': name} for name in area_names]
+    dropdown_options = [{'label': name, 'value': name} for name in load_area_names()]
 
     return html.Div([
         html.H1("LAPD Crime Report Summarizer", style={'textAlign': 'center', 'fontFamily': 'Arial, sans-serif', 'color': '#007BFF'}),
@@ -107,6 +115,7 @@ def register_callbacks_summariser(app):
             return '', 'Please provide both Area Name and Months to Look Back.'
 
         try:
+            clock = StageClock()
             print("Loading preprocessed data...")
             crime_data = pd.read_csv(DATA_PATH)
             crime_data['DATE OCC'] = pd.to_datetime(
@@ -122,6 +131,7 @@ def register_callbacks_summariser(app):
             ]
 
             texts = filtered['Crime_Profile_Text'].dropna().astype(str).tolist()
+            clock.lap("filter")
             if not texts:
                 return '', f"No records found for {area_name} in the last {months_back} months."
 
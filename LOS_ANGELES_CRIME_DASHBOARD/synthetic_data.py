@@ -0,0 +1,169 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from crime_profiles import mocode_table, profile_frame
+from crime_rollups import LAPD_DATE_FORMAT
+
+CRIME_DATA_FILE = "crime_data_cleaned_2020_present.csv"
+PROFILE_DATA_FILE = "crimeProfileText_data.csv"
+CHUNK_SIZE = 500_000
+
+# ------------------- Distributions -------------------
+# Approximate shares in the LAPD 2020-present data; weights are normalised.
+# Area: (weight, centroid lat, centroid lon)
+AREAS = {
+    "77th Street": (7.0, 33.966, -118.290), "Central": (6.9, 34.046, -118.248),
+    "Pacific": (6.0, 33.980, -118.420), "Southwest": (5.8, 34.023, -118.308),
+    "Hollywood": (5.4, 34.098, -118.330), "Southeast": (5.2, 33.938, -118.262),
+    "Olympic": (5.1, 34.054, -118.305), "Newton": (5.0, 34.010, -118.257),
+    "N Hollywood": (5.0, 34.172, -118.380), "Wilshire": (4.8, 34.062, -118.355),
+    "Rampart": (4.6, 34.065, -118.275), "West LA": (4.6, 34.045, -118.445),
+    "Northeast": (4.3, 34.118, -118.225), "Van Nuys": (4.3, 34.185, -118.448),
+    "West Valley": (4.2, 34.195, -118.530), "Harbor": (4.1, 33.780, -118.280),
+    "Topanga": (4.1, 34.210, -118.600), "Mission": (4.0, 34.270, -118.450),
+    "Devonshire": (3.9, 34.255, -118.540), "Hollenbeck": (3.6, 34.045, -118.205),
+    "Foothill": (3.3, 34.255, -118.390),
+}
+# Crime type: (weight, Crime Severity)
+CRIME_TYPES = {
+    "VEHICLE - STOLEN": (11.0, "Medium"),
+    "BATTERY - SIMPLE ASSAULT": (7.6, "Medium"),
+    "BURGLARY FROM VEHICLE": (6.0, "Low"),
+    "THEFT OF IDENTITY": (6.0, "Low"),
+    "VANDALISM - FELONY ($400 & OVER, ALL CHURCH VANDALISMS)": (6.0, "Low"),
+    "BURGLARY": (5.9, "Medium"),
+    "ASSAULT WITH DEADLY WEAPON, AGGRAVATED ASSAULT": (5.0, "High"),
+    "THEFT PLAIN - PETTY ($950 & UNDER)": (5.0, "Low"),
+    "INTIMATE PARTNER - SIMPLE ASSAULT": (4.6, "Medium"),
+    "THEFT FROM MOTOR VEHICLE - PETTY ($950 & UNDER)": (4.0, "Low"),
+    "THEFT-GRAND ($950.01 & OVER)EXCPT,GUNS,FOWL,LIVESTK,PROD": (3.4, "Low"),
+    "ROBBERY": (3.3, "High"),
+    "SHOPLIFTING - PETTY THEFT ($950 & UNDER)": (3.0, "Low"),
+    "THEFT FROM MOTOR VEHICLE - GRAND ($950.01 AND OVER)": (2.6, "Low"),
+    "VANDALISM - MISDEAMEANOR ($399 OR UNDER)": (2.6, "Low"),
+    "CRIMINAL THREATS - NO WEAPON DISPLAYED": (2.1, "Medium"),
+    "BRANDISH WEAPON": (1.5, "High"),
+    "INTIMATE PARTNER - AGGRAVATED ASSAULT": (1.2, "High"),
+    "TRESPASSING": (1.2, "Low"),
+    "ATTEMPTED ROBBERY": (1.0, "High"),
+    "BURGLARY, ATTEMPTED": (0.9, "Medium"),
+    "OTHER MISCELLANEOUS CRIME": (0.9, "Low"),
+    "EMBEZZLEMENT, GRAND THEFT ($950.01 & OVER)": (0.7, "Low"),
+    "VIOLATION OF RESTRAINING ORDER": (0.7, "Medium"),
+    "RAPE, FORCIBLE": (0.3, "High"),
+    "KIDNAPPING": (0.2, "High"),
+    "CRIMINAL HOMICIDE": (0.2, "High"),
+}
+PREMISES = {
+    "STREET": 25.0, "SINGLE FAMILY DWELLING": 16.5, "MULTI-UNIT DWELLING (APARTMENT, DUPLEX, ETC)": 12.0,
+    "PARKING LOT": 7.0, "OTHER BUSINESS": 4.8, "SIDEWALK": 4.8, "VEHICLE, PASSENGER/TRUCK": 3.0,
+    "GARAGE/CARPORT": 2.0, "DRIVEWAY": 1.6, "DEPARTMENT STORE": 1.3, "RESTAURANT/FAST FOOD": 1.2,
+    "MARKET": 1.0, "PARKING UNDERGROUND/BUILDING": 1.0, "OTHER PREMISE": 1.0, "ALLEY": 0.8,
+    "PARK/PLAYGROUND": 0.7, "HOTEL": 0.6, "CONDOMINIUM/TOWNHOUSE": 0.6, "YARD (RESIDENTIAL/BUSINESS)": 0.6,
+    "GAS STATION": 0.5, "CYBERSPACE": 0.5, "MTA BUS": 0.3, "HIGH SCHOOL": 0.3, "BANK": 0.3,
+}
+WEAPONS = {
+    "": 65.0, "STRONG-ARM (HANDS, FIST, FEET OR BODILY FORCE)": 18.0, "UNKNOWN WEAPON/OTHER WEAPON": 3.7,
+    "VERBAL THREAT": 2.5, "HAND GUN": 2.0, "SEMI-AUTOMATIC PISTOL": 0.8, "KNIFE WITH BLADE 6INCHES OR LESS": 0.7,
+    "OTHER KNIFE": 0.5, "UNKNOWN FIREARM": 0.5, "VEHICLE": 0.4, "FOLDING KNIFE": 0.2, "BLUNT INSTRUMENT": 0.2,
+}
+VICT_SEX = {"M": 42.0, "F": 38.0, "X": 19.0, "H": 1.0}
+VICT_DESCENT = {"H": 30.0, "W": 20.0, "B": 14.0, "X": 12.0, "O": 8.0, "A": 2.2, "K": 0.6, "F": 0.4,
+                "C": 0.3, "J": 0.1, "V": 0.1, "I": 0.1, "Z": 0.05, "P": 0.03, "U": 0.01, "G": 0.01,
+                "S": 0.01, "D": 0.01, "L": 0.01}
+# Incidents by hour of day: quiet before dawn, noon spike (the default time), evening peak
+HOUR_WEIGHTS = [4.0, 3.2, 2.7, 2.2, 1.8, 1.7, 2.3, 2.9, 3.8, 3.9, 4.0, 3.9,
+                6.9, 4.1, 4.3, 4.6, 4.8, 5.1, 5.2, 5.0, 4.9, 4.6, 4.4, 3.7]
+START_DATE, END_DATE = pd.Timestamp("2020-01-01"), pd.Timestamp("2024-12-31")
+
+def _choice(rng, table, n):
+    keys = list(table)
+    weights = np.array([v[0] if isinstance(v, tuple) else v for v in table.values()], dtype=float)
+    return np.asarray(keys, dtype=object)[rng.choice(len(keys), n, p=weights / weights.sum())]
+
+
+def _mocode_pool(rng, size=5_000):
+    """Lists of 1-4 MO codes, sampled once and reused across rows."""
+    codes = mocode_table.index.to_numpy()
+    return np.array([" ".join(codes[rng.choice(len(codes), n_codes, replace=False)])
+                     for n_codes in rng.integers(1, 5, size)], dtype=object)
+
+
+# ------------------- Generation -------------------
+def make_incidents(n, rng, first_dr_no=200_000_000, mocode_pool=None):
+    """One chunk of incidents with the columns of crime_data_cleaned_2020_present.csv."""
+    areas = _choice(rng, AREAS, n)
+    crime_types = _choice(rng, CRIME_TYPES, n)
+    centroids = np.array([AREAS[a][1:] for a in AREAS])[pd.Index(list(AREAS)).get_indexer(areas)]
+
+    days = rng.integers(0, (END_DATE - START_DATE).days + 1, n)
+    dates = START_DATE + pd.to_timedelta(days, unit="D")
+    hours = rng.choice(24, n, p=np.array(HOUR_WEIGHTS) / sum(HOUR_WEIGHTS))
+    # About a quarter of victims are businesses/vehicles, recorded with age 0
+    ages = np.where(rng.random(n) < 0.25, 0, np.clip(rng.normal(39, 15, n).round(), 2, 99)).astype(int)
+
+    pool = mocode_pool if mocode_pool is not None else _mocode_pool(rng)
+    mocodes = pool[rng.integers(0, len(pool), n)]
+
+    return pd.DataFrame({
+        "DR_NO": np.arange(first_dr_no, first_dr_no + n),
+        "DATE OCC": dates.strftime(LAPD_DATE_FORMAT),
+        "AREA NAME": areas,
+        "Crm Cd Desc": crime_types,
+        "Premis Desc": _choice(rng, PREMISES, n),
+        "Weapon Desc": _choice(rng, WEAPONS, n),
+        "Mocodes": mocodes,
+        "Hour": hours,
+        "Month": dates.month,
+        "Vict Sex": _choice(rng, VICT_SEX, n),
+        "Vict Descent": _choice(rng, VICT_DESCENT, n),
+        "Vict Age": ages,
+        "Crime Severity": np.array([CRIME_TYPES[c][1] for c in crime_types], dtype=object),
+        "LAT": (centroids[:, 0] + rng.normal(0, 0.018, n)).round(4),
+        "LON": (centroids[:, 1] + rng.normal(0, 0.018, n)).round(4),
+    })
+
+
+def make_profiles(incidents):
+    """crimeProfileText_data.csv rows for the incidents (crime_profiles.generate_crime_profile's texts)."""
+    return profile_frame(incidents)
+
+
+def generate(rows, out_dir=".", seed=42, chunk_size=CHUNK_SIZE, profiles=True):
+    """Write both synthetic CSVs to out_dir, chunk by chunk (memory stays flat up to 10M+ rows).
+
+    The same seed, rows and chunk_size always produce the same files.
+    profiles=False skips the profile CSV (and returns None for its path).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    crime_path = os.path.join(out_dir, CRIME_DATA_FILE)
+    profile_path = os.path.join(out_dir, PROFILE_DATA_FILE)
+    rng = np.random.default_rng(seed)
+    mocode_pool = _mocode_pool(rng)
+
+    for start in range(0, rows, chunk_size):
+        incidents = make_incidents(min(chunk_size, rows - start), rng, 200_000_000 + start, mocode_pool)
+        mode, header = ("w", True) if start == 0 else ("a", False)
+        incidents.to_csv(crime_path, mode=mode, header=header, index=False)
+        if profiles:
+            make_profiles(incidents).to_csv(profile_path, mode=mode, header=header, index=False)
+        print(f"🔄 Generated {start + len(incidents):,}/{rows:,} incidents")
+    return crime_path, profile_path if profiles else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic LAPD incident and profile CSVs")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--out-dir", default="synthetic_data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--no-profiles", action="store_true", help="only write the incident CSV")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    paths = generate(args.rows, args.out_dir, args.seed, args.chunk_size, profiles=not args.no_profiles)
+    print(f"✅ Wrote {', '.join(p for p in paths if p)} in {time.perf_counter() - t0:.1f}s")
@@ -0,0 +1,109 @@
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from crime_queries import DuckDBBackend, IncidentFilter, PandasQueries, export_parquet
+from crime_rollups import LAPD_DATE_FORMAT
+
+pytest.importorskip("duckdb")
+
+AGE_BINS, AGE_LABELS = [0, 18, 35, 50, 65, 100], ['0-18', '19-35', '36-50', '51-65', '66+']
+FIRST, LAST = pd.Timestamp('2020-01-01'), pd.Timestamp('2024-12-31')
+
+
+def make_incidents():
+    """A small typed incident frame, as crime_store holds it, with the awkward cases in it:
+    missing sex/descent/age/hour/coordinates, ages on the bin edges and dates on the range ends."""
+    rng = np.random.default_rng(7)
+    n = 400
+    dates = FIRST + pd.to_timedelta(rng.integers(0, (LAST - FIRST).days + 1, n), unit='D')
+    dates = dates.to_numpy()
+    dates[:3], dates[3:6] = FIRST, LAST
+    age = rng.integers(-1, 101, n).astype(float)
+    age[:5] = [0, 18, 65, 100, -1]
+    age[rng.random(n) < 0.1] = np.nan
+    lat = rng.uniform(33.9, 34.2, n)
+    lon = rng.uniform(-118.4, -118.1, n)
+    lat[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        'DR_NO': np.arange(200_000_000, 200_000_000 + n, dtype=np.int64),
+        'DATE OCC': pd.DatetimeIndex(dates),
+        'AREA NAME': rng.choice(['Central', 'Hollywood', 'Newton', '77th Street'], n),
+        'Crm Cd Desc': rng.choice(['BURGLARY', 'ROBBERY', 'VANDALISM', 'ASSAULT'], n),
+        'Premis Desc': rng.choice(['STREET', 'SINGLE FAMILY DWELLING', None], n),
+        'Crime Severity': rng.choice(['Low', 'Medium', 'High'], n),
+        'Vict Sex': rng.choice(['M', 'F', 'X', None], n),
+        'Vict Descent': rng.choice(['H', 'W', 'B', None], n),
+        'Vict Age': age,
+        'Hour': np.where(rng.random(n) < 0.05, np.nan, rng.integers(0, 24, n)),
+        'LAT': lat,
+        'LON': lon,
+    })
+
+
+@pytest.fixture(scope='module')
+def backends(tmp_path_factory):
+    """PandasQueries over the frame, and DuckDBQueries over its CSV export and that CSV's Parquet copy."""
+    incidents = make_incidents()
+    data_dir = tmp_path_factory.mktemp('incidents')
+    csv_path, parquet_path = str(data_dir / 'crime_data.csv'), str(data_dir / 'crime_data.parquet')
+    incidents.assign(**{'DATE OCC': incidents['DATE OCC'].dt.strftime(LAPD_DATE_FORMAT)}).to_csv(csv_path, index=False)
+    export_parquet(csv_path, parquet_path)
+    return PandasQueries(incidents), {'csv': DuckDBBackend(csv_path), 'parquet': DuckDBBackend(parquet_path)}
+
+
+FILTERS = [
+    IncidentFilter(),
+    IncidentFilter(areas=('Central',)),
+    IncidentFilter(areas=('Central', 'Newton')),
+    IncidentFilter(areas=('Nowhere',)),  # an area with no incidents
+    IncidentFilter(start=FIRST, end=FIRST),  # both ends of the range are inclusive
+    IncidentFilter(start=LAST, end=LAST),
+    IncidentFilter(start=pd.Timestamp('2022-06-01'), crime_types=('ROBBERY', 'ASSAULT')),
+    IncidentFilter(premises=('STREET',), with_coords=True),
+]
+
+
+def same_frames(expected, actual, ordered=True):
+    expected, actual = expected.reset_index(drop=True), actual.reset_index(drop=True)
+    if not ordered:
+        expected = expected.sort_values(list(expected.columns), ignore_index=True)
+        actual = actual.sort_values(list(actual.columns), ignore_index=True)
+    pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_index_type=False)
+
+
+@pytest.mark.parametrize('source', ['csv', 'parquet'])
+@pytest.mark.parametrize('where', FILTERS)
+@pytest.mark.parametrize('column', ['Crm Cd Desc', 'Vict Sex', 'Vict Descent', 'Hour', 'AREA NAME',
+                                    'Crime Severity'])
+def test_count_by(backends, source, where, column):
+    reference, duckdb_backends = backends
+    queries = duckdb_backends[source].queries()
+    same_frames(reference.count_by(column, where), queries.count_by(column, where))
+    same_frames(reference.count_by(column, where, limit=2), queries.count_by(column, where, limit=2))
+
+
+@pytest.mark.parametrize('source', ['csv', 'parquet'])
+@pytest.mark.parametrize('where', FILTERS)
+def test_count_binned(backends, source, where):
+    reference, duckdb_backends = backends
+    queries = duckdb_backends[source].queries()
+    same_frames(reference.count_binned('Vict Age', AGE_BINS, AGE_LABELS, where),
+                queries.count_binned('Vict Age', AGE_BINS, AGE_LABELS, where))
+
+
+@pytest.mark.parametrize('source', ['csv', 'parquet'])
+@pytest.mark.parametrize('where', FILTERS)
+def test_hotspot_queries(backends, source, where):
+    # What update_charts and hover_points ask for: mapped incidents, top areas, points in view
+    reference, duckdb_backends = backends
+    queries = duckdb_backends[source].queries()
+    mapped = replace(where, with_coords=True)
+    same_frames(reference.rows(['LAT', 'LON'], mapped), queries.rows(['LAT', 'LON'], mapped), ordered=False)
+    same_frames(reference.count_by('AREA NAME', mapped, limit=10), queries.count_by('AREA NAME', mapped, limit=10))
+    in_view = replace(mapped, bbox=(-118.3, 34.0, -118.2, 34.1))
+    columns = ['LAT', 'LON', 'Crm Cd Desc', 'Premis Desc', 'DATE OCC']
+    same_frames(reference.rows(columns, in_view, limit=2_000), queries.rows(columns, in_view, limit=2_000),
+                ordered=False)
@@ -0,0 +1,73 @@
+import dash
+from dash import dcc, html
+
+from lazy_tabs import RENDERED_STORE, pane_id, register_tab_callbacks, tab_panes
+
+# Two tabs standing in for the dashboard's: a filter tab and the severity tab,
+# whose history store lives in the page layout as in crime_dash_board.py
+TABS = ['area', 'severity']
+
+
+def make_app():
+    renders = []
+
+    def render(tab):
+        renders.append(tab)
+        return html.Div([dcc.Dropdown(['A', 'B'], 'A', id=f'{tab}-filter'), html.Pre(id=f'{tab}-output')])
+
+    app = dash.Dash(__name__, suppress_callback_exceptions=True)
+    app.layout = html.Div([
+        dcc.Tabs(id='main-tabs', value='area', children=[dcc.Tab(label=t, value=t) for t in TABS]),
+        dcc.Store(id='crime_history_store', data=[]),
+        html.Div(id='tab-content', children=tab_panes(TABS, 'area', render('area'))),
+    ])
+    register_tab_callbacks(app, 'main-tabs', TABS, render)
+    return app, renders
+
+
+class Browser:
+    """The component state a browser holds, updated from the server's callback responses."""
+
+    def __init__(self, app):
+        self.app = app
+        self.client = app.server.test_client()
+        self.props = {'crime_history_store': {'data': []}, RENDERED_STORE: {'data': ['area']}}
+        for tab in TABS:
+            self.props[pane_id(tab)] = {'children': 'rendered' if tab == 'area' else None}
+
+    def select(self, tab):
+        output, = self.app.callback_map
+        payload = {
+            'output': output,
+            'outputs': [dict(zip(['id', 'property'], o.split('.'))) for o in output.strip('.').split('...')],
+            'inputs': [{'id': 'main-tabs', 'property': 'value', 'value': tab}],
+            'state': [{'id': RENDERED_STORE, 'property': 'data', 'value': self.props[RENDERED_STORE]['data']}],
+            'changedPropIds': ['main-tabs.value'],
+        }
+        response = self.client.post('/_dash-update-component', json=payload)
+        assert response.status_code == 200
+        for component, props in response.get_json()['response'].items():
+            self.props[component].update(props)
+        return response.get_json()['response']
+
+
+def test_history_survives_tab_switches():
+    app, renders = make_app()
+    browser = Browser(app)
+
+    browser.select('severity')
+    browser.props['crime_history_store']['data'].append({'score': 7, 'crime_desc': 'Burglary'})
+    severity_pane = browser.props[pane_id('severity')]['children']
+
+    for tab in ['area', 'severity', 'area', 'severity']:
+        updated = browser.select(tab)
+        # Switching only toggles visibility of already-rendered panes
+        assert set(updated) == {pane_id(t) for t in TABS}
+        assert all(set(props) == {'style'} for props in updated.values())
+
+    assert browser.props['crime_history_store']['data'] == [{'score': 7, 'crime_desc': 'Burglary'}]
+    assert browser.props[pane_id('severity')]['children'] == severity_pane
+    assert browser.props[pane_id('severity')]['style'] == {'display': 'block'}
+    assert browser.props[pane_id('area')]['style'] == {'display': 'none'}
+    # Each tab is rendered once, however often it is selected
+    assert renders == ['area', 'severity']
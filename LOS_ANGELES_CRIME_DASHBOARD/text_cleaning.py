@@ -0,0 +1,96 @@
+import re
+import sys
+
+import joblib
+import nltk
+import pandas as pd
+from nltk.tokenize import word_tokenize
+
+nltk.data.path.append("./nltk_data")
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# ============================
+# 🔤 Per-row reference cleaner
+# ============================
+def clean_text(text):
+    text = str(text).lower()
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    return ' '.join(word_tokenize(text))
+
+# ============================
+# ⚡ Vectorized bulk cleaner
+# ============================
+# Python's `\s` (and str.split) covers all Unicode whitespace while RE2, used
+# by the Arrow string kernels, only knows ASCII `\s`. Spelling the class out
+# keeps both engines byte-identical to clean_text.
+WHITESPACE = ''.join(c for c in map(chr, range(sys.maxunicode + 1)) if c.isspace())
+NON_LETTER_PATTERN = f"[^a-zA-Z{WHITESPACE}]"
+# Runs of plain single spaces are already normalized; only rewrite the rest.
+WHITESPACE_PATTERN = f"[{WHITESPACE}]{{2,}}|[{WHITESPACE.replace(' ', '')}]"
+
+# Once only letters and whitespace remain, word_tokenize reduces to a
+# whitespace split plus NLTK's MacIntyre contraction splits (in NLTK order).
+# "wanna" uses `(?=\s)` upstream; RE2 has no lookahead, so the trailing pad
+# space is consumed and re-emitted instead.
+CONTRACTION_PATTERNS = [
+    (r"\b(can)(not)\b", r" \1 \2 "),
+    (r"\b(gim)(me)\b", r" \1 \2 "),
+    (r"\b(gon)(na)\b", r" \1 \2 "),
+    (r"\b(got)(ta)\b", r" \1 \2 "),
+    (r"\b(lem)(me)\b", r" \1 \2 "),
+    (r"\b(wan)(na) ", r" \1 \2  "),
+]
+CONTRACTION_CANDIDATES = r"can|gim|gon|got|lem|wan"
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def _to_string_series(s, engine):
+    # str() every value as clean_text does, so missing values become 'nan',
+    # 'None' or '<NA>' (astype(str) keeps them missing under pandas 3)
+    if not isinstance(s.dtype, pd.StringDtype) or s.hasnans:
+        s = s.astype(object).map(str)
+    if engine == "pyarrow":
+        return s.astype("string[pyarrow]")
+    return s.astype(object)
+
+
+def _clean_chunk(s, engine):
+    s = _to_string_series(s, engine).str.lower()
+    s = s.str.replace(NON_LETTER_PATTERN, '', regex=True)
+    s = ' ' + s.str.replace(WHITESPACE_PATTERN, ' ', regex=True) + ' '
+    candidates = s.str.contains(CONTRACTION_CANDIDATES, regex=True).to_numpy(dtype=bool)
+    if candidates.any():
+        split = s[candidates]
+        for pattern, repl in CONTRACTION_PATTERNS:
+            split = split.str.replace(pattern, repl, regex=True)
+        s = s.copy()
+        s[candidates] = split.str.replace(r" {2,}", ' ', regex=True).array
+    return s.str.strip(' ')
+
+
+def clean_text_bulk(texts, engine="auto", n_jobs=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Column-wise equivalent of clean_text for a whole Series/list of profiles.
+
+    engine is "pyarrow" (Arrow string kernels), "python" (object dtype) or
+    "auto". Input is processed in chunks of chunk_size rows to bound peak
+    memory; with n_jobs != 1 the chunks are cleaned in parallel via joblib.
+    The result keeps the input index.
+    """
+    if engine == "auto":
+        engine = "pyarrow" if HAS_PYARROW else "python"
+    if engine not in ("pyarrow", "python"):
+        raise ValueError(f"Unknown engine: {engine}")
+
+    s = texts if isinstance(texts, pd.Series) else pd.Series(texts)
+    chunks = [s.iloc[i:i + chunk_size] for i in range(0, len(s), chunk_size)] or [s]
+    if n_jobs == 1 or len(chunks) == 1:
+        cleaned = [_clean_chunk(chunk, engine) for chunk in chunks]
+    else:
+        cleaned = joblib.Parallel(n_jobs=n_jobs)(joblib.delayed(_clean_chunk)(chunk, engine) for chunk in chunks)
+    return pd.concat(cleaned) if len(cleaned) > 1 else cleaned[0]
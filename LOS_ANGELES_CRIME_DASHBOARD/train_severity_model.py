@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import SGDRegressor
+from sklearn.metrics import mean_absolute_error
+
+from severity_labeling import label_severity
+from text_cleaning import clean_text_bulk
+
+# ------------------- Configuration -------------------
+DATA_PATH = "crimeProfileText_data.csv"
+OUT_DIR = "severity_artifacts"
+MODEL_NAME = "all-mpnet-base-v2"
+MODEL_PATH = "severity_regressor.pkl"
+TEXT_COLUMN = "Crime_Profile_Text"
+CHUNK_SIZE = 10_000
+BATCH_SIZE = 64
+BLOCK_SIZE = 50_000
+TEST_FRACTION = 0.2
+
+EMBEDDINGS_FILE = "embeddings.npy"
+LABELS_FILE = "labels.npy"
+CHECKPOINT_FILE = "checkpoint.json"
+TIMINGS_FILE = "timings.json"
+
+
+# ------------------- Helpers -------------------
+def _write_json(path, data):
+    # Write-then-rename so an interrupted run never leaves a torn checkpoint.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _iter_profiles(data_path, chunk_size):
+    for chunk in pd.read_csv(data_path, usecols=[TEXT_COLUMN], chunksize=chunk_size):
+        yield chunk[TEXT_COLUMN].fillna('')
+
+
+# ------------------- Stages -------------------
+def count_rows(data_path, chunk_size=CHUNK_SIZE):
+    """Number of profiles in the CSV (quoted multi-line texts make `wc -l` unreliable)."""
+    return sum(len(chunk) for chunk in _iter_profiles(data_path, chunk_size))
+
+
+def embed_to_memmap(data_path, out_dir, encoder, n_rows, dim, model_name=MODEL_NAME,
+                    chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE):
+    """Stream profiles, writing embeddings and proxy labels chunk by chunk.
+
+    Embeddings go to a float32 .npy memmap of shape (n_rows, dim). After every
+    chunk is flushed, the checkpoint records how many rows are done, so a rerun
+    with the same inputs resumes from there instead of starting over.
+    """
+    embeddings_path = os.path.join(out_dir, EMBEDDINGS_FILE)
+    labels_path = os.path.join(out_dir, LABELS_FILE)
+    checkpoint_path = os.path.join(out_dir, CHECKPOINT_FILE)
+
+    state = {"data_path": os.path.abspath(data_path), "model_name": model_name,
+             "n_rows": n_rows, "dim": dim, "chunk_size": chunk_size}
+    checkpoint = _read_json(checkpoint_path)
+    resumable = (checkpoint is not None
+                 and {k: checkpoint.get(k) for k in state} == state
+                 and os.path.exists(embeddings_path) and os.path.exists(labels_path))
+
+    if resumable:
+        rows_done = checkpoint["rows_done"]
+        embeddings = np.load(embeddings_path, mmap_mode="r+")
+        labels = np.load(labels_path, mmap_mode="r+")
+        print(f"↩️ Resuming from row {rows_done:,} of {n_rows:,}")
+    else:
+        rows_done = 0
+        embeddings = np.lib.format.open_memmap(embeddings_path, mode="w+", dtype=np.float32, shape=(n_rows, dim))
+        labels = np.lib.format.open_memmap(labels_path, mode="w+", dtype=np.float32, shape=(n_rows,))
+        _write_json(checkpoint_path, {**state, "rows_done": 0})
+
+    start = 0
+    for texts in _iter_profiles(data_path, chunk_size):
+        end = start + len(texts)
+        if end > rows_done:
+            cleaned = clean_text_bulk(texts)
+            embeddings[start:end] = encoder.encode(cleaned.tolist(), batch_size=batch_size)
+            labels[start:end] = label_severity(cleaned)[0].to_numpy()
+            embeddings.flush()
+            labels.flush()
+            rows_done = end
+            _write_json(checkpoint_path, {**state, "rows_done": rows_done})
+            print(f"🔄 Embedded {rows_done:,}/{n_rows:,} profiles")
+        start = end
+
+    if rows_done != n_rows:
+        raise ValueError(f"{data_path} changed while embedding: expected {n_rows:,} rows, read {rows_done:,}")
+    return embeddings_path, labels_path
+
+
+def fit_regressor(embeddings_path, labels_path, estimator="forest", test_fraction=TEST_FRACTION,
+                  block_size=BLOCK_SIZE, max_samples=None):
+    """Fit the severity regressor straight from the memmapped embeddings.
+
+    The holdout is the tail of the file so train/test are slices (views) of the
+    memmap rather than fancy-indexed copies. "forest" fits the same
+    RandomForestRegressor as NLPC5 on the memmap (pages are read by the OS on
+    demand; max_samples bounds each tree's bootstrap). "sgd" streams blocks
+    through SGDRegressor.partial_fit and never holds more than one block.
+    """
+    X = np.load(embeddings_path, mmap_mode="r")
+    y = np.load(labels_path, mmap_mode="r")
+    n_train = int(len(X) * (1 - test_fraction))
+
+    if estimator == "forest":
+        regressor = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1, max_samples=max_samples)
+        regressor.fit(X[:n_train], y[:n_train])
+    elif estimator == "sgd":
+        regressor = SGDRegressor(random_state=42)
+        for start in range(0, n_train, block_size):
+            end = min(start + block_size, n_train)
+            regressor.partial_fit(np.asarray(X[start:end]), np.asarray(y[start:end]))
+    else:
+        raise ValueError(f"Unknown estimator: {estimator}")
+
+    abs_error = 0.0
+    for start in range(n_train, len(X), block_size):
+        end = min(start + block_size, len(X))
+        abs_error += mean_absolute_error(y[start:end], regressor.predict(X[start:end])) * (end - start)
+    mae = abs_error / max(len(X) - n_train, 1)
+    return regressor, mae
+
+
+# ------------------- Entry point -------------------
+def train(data_path=DATA_PATH, out_dir=OUT_DIR, model_path=MODEL_PATH, model_name=MODEL_NAME,
+          estimator="forest", chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, max_samples=None, encoder=None):
+    os.makedirs(out_dir, exist_ok=True)
+    timings = {}
+
+    t0 = time.perf_counter()
+    n_rows = count_rows(data_path, chunk_size)
+    timings["count_rows"] = time.perf_counter() - t0
+    print(f"📁 {n_rows:,} profiles in {data_path}")
+
+    t0 = time.perf_counter()
+    if encoder is None:
+        from sentence_transformers import SentenceTransformer
+        encoder = SentenceTransformer(model_name)
+    dim = encoder.get_sentence_embedding_dimension()
+    timings["load_encoder"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    embeddings_path, labels_path = embed_to_memmap(data_path, out_dir, encoder, n_rows, dim, model_name,
+                                                   chunk_size, batch_size)
+    timings["embed"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    regressor, mae = fit_regressor(embeddings_path, labels_path, estimator, max_samples=max_samples)
+    timings["fit"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    joblib.dump(regressor, model_path)
+    timings["save"] = time.perf_counter() - t0
+
+    _write_json(os.path.join(out_dir, TIMINGS_FILE),
+                {"n_rows": n_rows, "estimator": estimator, "holdout_mae": mae, "seconds": timings})
+    for stage, secs in timings.items():
+        print(f"🕒 {stage:<13} {secs:10.2f}s")
+    print(f"✅ Regressor saved to {model_path} (holdout MAE {mae:.3f})")
+    return regressor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the severity regressor on the full profile dataset")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--out-dir", default=OUT_DIR)
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--model-name", default=MODEL_NAME)
+    parser.add_argument("--estimator", choices=["forest", "sgd"], default="forest")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--max-samples", type=float, default=None,
+                        help="fraction of training rows bootstrapped per tree (forest only)")
+    args = parser.parse_args()
+
+    train(args.data, args.out_dir, args.model_path, args.model_name, args.estimator,
+          args.chunk_size, args.batch_size, args.max_samples)
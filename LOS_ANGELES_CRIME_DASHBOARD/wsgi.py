@@ -0,0 +1,10 @@
+# WSGI entry point for production: gunicorn -c gunicorn.conf.py wsgi:server
+from crime_dash_board import app
+
+
+def create_server():
+    """Flask server behind the Dash app (data and models are loaded on import)."""
+    return app.server
+
+
+server = create_server()